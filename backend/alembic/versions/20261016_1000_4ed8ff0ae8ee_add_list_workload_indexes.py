@@ -0,0 +1,43 @@
+"""add_list_workload_indexes
+
+Revision ID: 4ed8ff0ae8ee
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4ed8ff0ae8ee'
+down_revision: Union[str, None] = 'a1b2c3d4e5f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        # Composite index on watch_history (user_id, last_watched_at) so the
+        # per-user history / continue watching lists are read in index order
+        op.create_index(
+            'ix_watch_history_user_last', 'watch_history', ['user_id', 'last_watched_at'],
+            unique=False, postgresql_concurrently=True
+        )
+
+        # Thumbnail lookups and cascading deletes by video
+        # (the original index was dropped in fef8a2c2eebc)
+        op.create_index(
+            'ix_video_thumbnails_video_id', 'video_thumbnails', ['video_id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    # Remove indexes in reverse order
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_video_thumbnails_video_id', table_name='video_thumbnails', postgresql_concurrently=True)
+        op.drop_index('ix_watch_history_user_last', table_name='watch_history', postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""add_video_rating_aggregates
+
+Revision ID: 797a075c5d8d
+Revises: 4ed8ff0ae8ee
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '797a075c5d8d'
+down_revision: Union[str, None] = '4ed8ff0ae8ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Denormalized rating aggregates (maintained by rating_service)
+    op.add_column('videos', sa.Column('avg_rating', sa.Float(), server_default='0', nullable=False))
+    op.add_column('videos', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from existing ratings
+    op.execute(
+        """
+        UPDATE videos
+        SET avg_rating = stats.avg_rating,
+            rating_count = stats.rating_count
+        FROM (
+            SELECT video_id, AVG(score) AS avg_rating, COUNT(id) AS rating_count
+            FROM ratings
+            GROUP BY video_id
+        ) AS stats
+        WHERE videos.id = stats.video_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('videos', 'rating_count')
+    op.drop_column('videos', 'avg_rating')
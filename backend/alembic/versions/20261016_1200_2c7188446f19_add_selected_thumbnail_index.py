@@ -0,0 +1,32 @@
+"""add_selected_thumbnail_index
+
+Revision ID: 2c7188446f19
+Revises: 797a075c5d8d
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c7188446f19'
+down_revision: Union[str, None] = '797a075c5d8d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Partial index: only the selected thumbnail of each video is indexed
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_video_thumbnails_selected', 'video_thumbnails', ['video_id'],
+            unique=False, postgresql_where=sa.text('is_selected'), postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_video_thumbnails_selected', table_name='video_thumbnails', postgresql_concurrently=True)
@@ -0,0 +1,70 @@
+"""store_video_status_as_smallint
+
+Revision ID: 5b9e0f3a7c21
+Revises: 2c7188446f19
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b9e0f3a7c21'
+down_revision: Union[str, None] = '2c7188446f19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match app.models.video._STATUS_TO_CODE
+STATUS_CODES = (('PROCESSING', 0), ('READY', 1), ('FAILED', 2), ('DELETED', 3))
+
+STATUS_INDEXES = (
+    ('ix_videos_status', ['status']),
+    ('ix_videos_status_created_at', ['status', 'created_at']),
+    ('ix_videos_status_view_count', ['status', 'view_count']),
+)
+
+
+def _drop_status_indexes() -> None:
+    for name, _ in STATUS_INDEXES:
+        op.drop_index(name, table_name='videos')
+
+
+def _create_status_indexes() -> None:
+    for name, columns in STATUS_INDEXES:
+        op.create_index(name, 'videos', columns, unique=False)
+
+
+def upgrade() -> None:
+    _drop_status_indexes()
+
+    op.add_column('videos', sa.Column('status_code', sa.SmallInteger(), nullable=True))
+    whens = ' '.join(f"WHEN '{name}' THEN {code}" for name, code in STATUS_CODES)
+    op.execute(f"UPDATE videos SET status_code = CASE status {whens} END")
+    op.alter_column('videos', 'status_code', nullable=False)
+
+    op.drop_column('videos', 'status')
+    op.alter_column('videos', 'status_code', new_column_name='status')
+    op.create_check_constraint('ck_videos_status', 'videos', f"status BETWEEN 0 AND {len(STATUS_CODES) - 1}")
+    sa.Enum(name='videostatus').drop(op.get_bind())
+
+    _create_status_indexes()
+
+
+def downgrade() -> None:
+    _drop_status_indexes()
+    op.drop_constraint('ck_videos_status', 'videos', type_='check')
+
+    videostatus = sa.Enum(*(name for name, _ in STATUS_CODES), name='videostatus')
+    videostatus.create(op.get_bind())
+    op.add_column('videos', sa.Column('status_name', videostatus, nullable=True))
+    whens = ' '.join(f"WHEN {code} THEN '{name}'::videostatus" for name, code in STATUS_CODES)
+    op.execute(f"UPDATE videos SET status_name = CASE status {whens} END")
+    op.alter_column('videos', 'status_name', nullable=False)
+
+    op.drop_column('videos', 'status')
+    op.alter_column('videos', 'status_name', new_column_name='status')
+
+    _create_status_indexes()
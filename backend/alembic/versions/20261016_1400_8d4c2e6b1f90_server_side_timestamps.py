@@ -0,0 +1,37 @@
+"""server_side_timestamps
+
+Revision ID: 8d4c2e6b1f90
+Revises: 5b9e0f3a7c21
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d4c2e6b1f90'
+down_revision: Union[str, None] = '5b9e0f3a7c21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = (
+    ('videos', 'created_at'),
+    ('videos', 'updated_at'),
+    ('watch_history', 'last_watched_at'),
+    ('watch_history', 'created_at'),
+    ('watch_history', 'updated_at'),
+)
+
+
+def upgrade() -> None:
+    # Naive UTC, same as the datetime.utcnow values already stored
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=sa.text("timezone('utc', now())"))
+
+
+def downgrade() -> None:
+    for table, column in TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=None)
@@ -0,0 +1,32 @@
+"""add_video_avg_rating_index
+
+Revision ID: 3e7a9c5d2b48
+Revises: 8d4c2e6b1f90
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7a9c5d2b48'
+down_revision: Union[str, None] = '8d4c2e6b1f90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Top rated videos and the list's rating sort walk this index in order
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_videos_status_avg_rating', 'videos', ['status', 'avg_rating'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_videos_status_avg_rating', table_name='videos', postgresql_concurrently=True)
@@ -0,0 +1,43 @@
+"""add_tag_and_rating_covering_indexes
+
+Revision ID: b6f1d8e3a9c7
+Revises: 3e7a9c5d2b48
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f1d8e3a9c7'
+down_revision: Union[str, None] = '3e7a9c5d2b48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Tag filters / per-tag counts: the (video_id, tag_id) primary key can't serve these
+        op.create_index(
+            'ix_video_tags_tag_video', 'video_tags', ['tag_id', 'video_id'],
+            unique=False, postgresql_concurrently=True
+        )
+        # Rating aggregate refresh reads (video_id, score) only; supersedes ix_ratings_video_id
+        op.create_index(
+            'ix_ratings_video_score', 'ratings', ['video_id', 'score'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.drop_index('ix_ratings_video_id', table_name='ratings', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_ratings_video_id', 'ratings', ['video_id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.drop_index('ix_ratings_video_score', table_name='ratings', postgresql_concurrently=True)
+        op.drop_index('ix_video_tags_tag_video', table_name='video_tags', postgresql_concurrently=True)
@@ -0,0 +1,38 @@
+"""add_case_insensitive_user_indexes
+
+Revision ID: c4a8e2f6d1b3
+Revises: b6f1d8e3a9c7
+Create Date: 2026-10-16 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e2f6d1b3'
+down_revision: Union[str, None] = 'b6f1d8e3a9c7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Lookups compare lower(email) / lower(username); these also stop
+        # accounts that differ only by case
+        op.create_index(
+            'ix_users_email_lower', 'users', [sa.text('lower(email)')],
+            unique=True, postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_users_username_lower', 'users', [sa.text('lower(username)')],
+            unique=True, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_username_lower', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_email_lower', table_name='users', postgresql_concurrently=True)
@@ -0,0 +1,57 @@
+"""add_search_trigram_indexes
+
+Revision ID: d7e3b9a1f5c2
+Revises: c4a8e2f6d1b3
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e3b9a1f5c2'
+down_revision: Union[str, None] = 'c4a8e2f6d1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pg_trgm is a trusted extension (PostgreSQL 13+), the database owner can create it
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        # Search matches ILIKE '%q%' on title, description and uploader
+        # username; trigram GIN indexes serve those without a sequential scan
+        op.create_index(
+            'ix_videos_title_trgm', 'videos', ['title'],
+            postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_videos_description_trgm', 'videos', ['description'],
+            postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_users_username_trgm', 'users', ['username'],
+            postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+        # Uploader matches become videos.user_id = ANY(...); the same index
+        # serves a user's videos ordered by created_at
+        op.create_index(
+            'ix_videos_user_created_at', 'videos', ['user_id', 'created_at'],
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    # The pg_trgm extension is left installed; other objects may use it
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_videos_user_created_at', table_name='videos', postgresql_concurrently=True)
+        op.drop_index('ix_users_username_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_videos_description_trgm', table_name='videos', postgresql_concurrently=True)
+        op.drop_index('ix_videos_title_trgm', table_name='videos', postgresql_concurrently=True)
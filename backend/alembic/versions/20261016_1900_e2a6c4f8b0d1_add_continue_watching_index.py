@@ -0,0 +1,36 @@
+"""add_continue_watching_index
+
+Revision ID: e2a6c4f8b0d1
+Revises: d7e3b9a1f5c2
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a6c4f8b0d1'
+down_revision: Union[str, None] = 'd7e3b9a1f5c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        # Continue watching: WHERE user_id = ? AND completed = false AND
+        # watch_position > 0 ORDER BY last_watched_at DESC LIMIT ?; the partial
+        # index holds only those rows, already in order
+        op.create_index(
+            'ix_watch_history_continue', 'watch_history',
+            ['user_id', sa.text('last_watched_at DESC')],
+            postgresql_where=sa.text('completed = false AND watch_position > 0'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_watch_history_continue', table_name='watch_history', postgresql_concurrently=True)
@@ -1,14 +1,26 @@
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import Response
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from app.core.cache import TTLCache
 from app.core.database import get_db
 from app.services import statistics_service
 from app.schemas.video import VideoListResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 
 router = APIRouter()
 
+POPULAR_CACHE_TTL = 60
+_popular_videos_cache = TTLCache(maxsize=64, ttl=POPULAR_CACHE_TTL)
+_video_list_adapter = TypeAdapter(List[VideoListResponse])
+
+
+def _list_item(row: RowMapping) -> VideoListResponse:
+    """Build a list item from a projected statistics_service row"""
+    return VideoListResponse(**{**row, "status": row["status"].value})
+
 
 class TopRatedVideoResponse(BaseModel):
     """Response schema for top rated video with statistics"""
@@ -48,26 +60,17 @@ async def get_popular_videos(
     Returns:
         List of popular videos ordered by view count
     """
-    videos = await statistics_service.get_popular_videos(db, limit=limit, skip=skip)
+    # View counts move constantly; the ranking is served from memory and
+    # refreshed once per POPULAR_CACHE_TTL window instead of per view
+    cache_key = (limit, skip)
+    body = _popular_videos_cache.get(cache_key)
+    if body is None:
+        videos = await statistics_service.get_popular_videos(db, limit=limit, skip=skip)
 
-    # Convert to response format
-    return [
-        VideoListResponse(
-            id=video.id,
-            title=video.title,
-            description=video.description,
-            file_size=video.file_size,
-            thumbnail_path=video.thumbnail_path,
-            duration=video.duration,
-            width=video.width,
-            height=video.height,
-            status=video.status,
-            view_count=video.view_count,
-            created_at=video.created_at,
-            uploader_username=video.uploader.username if video.uploader else None
-        )
-        for video in videos
-    ]
+        body = _video_list_adapter.dump_json([_list_item(row) for row in videos])
+        _popular_videos_cache.set(cache_key, body)
+
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/top-rated", response_model=List[TopRatedVideoResponse])
@@ -99,20 +102,7 @@ async def get_top_rated_videos(
     # Convert to response format
     return [
         TopRatedVideoResponse(
-            video=VideoListResponse(
-                id=item["video"].id,
-                title=item["video"].title,
-                description=item["video"].description,
-                file_size=item["video"].file_size,
-                thumbnail_path=item["video"].thumbnail_path,
-                duration=item["video"].duration,
-                width=item["video"].width,
-                height=item["video"].height,
-                status=item["video"].status,
-                view_count=item["video"].view_count,
-                created_at=item["video"].created_at,
-                uploader_username=item["video"].uploader.username if item["video"].uploader else None
-            ),
+            video=_list_item(item["video"]),
             avg_rating=item["avg_rating"],
             rating_count=item["rating_count"]
         )
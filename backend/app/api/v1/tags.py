@@ -1,5 +1,7 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_active_user
@@ -11,9 +13,30 @@ from app.schemas.tag import (
     TagSimple
 )
 from app.services.tag_service import tag_service
+from app.core.cache import TTLCache
 
 router = APIRouter()
 
+# Serialized popular-tags JSON keyed on limit. Cleared when tags are created,
+# renamed or deleted; attach/detach on videos only shifts counts, so those
+# are allowed to lag by up to the TTL.
+_popular_tags_cache = TTLCache(maxsize=64, ttl=300)
+_tag_list_adapter = TypeAdapter(List[TagResponse])
+
+
+def _tag_response(tag, video_count: int) -> TagResponse:
+    """Build TagResponse from a tag and a video count computed in SQL"""
+    return TagResponse(
+        id=tag.id,
+        name=tag.name,
+        slug=tag.slug,
+        description=tag.description,
+        color=tag.color,
+        created_at=tag.created_at,
+        updated_at=tag.updated_at,
+        video_count=video_count
+    )
+
 
 @router.post("/", response_model=TagSimple, status_code=status.HTTP_201_CREATED)
 async def create_tag(
@@ -31,6 +54,7 @@ async def create_tag(
     Returns TagSimple (without video_count) to avoid relationship loading issues
     """
     tag = await tag_service.create(db, tag_data)
+    _popular_tags_cache.clear()
     return tag
 
 
@@ -49,7 +73,7 @@ async def list_tags(
     - **search**: Optional search query
     """
     tags = await tag_service.get_all(db, skip=skip, limit=limit, search=search)
-    return tags
+    return [_tag_response(tag, count) for tag, count in tags]
 
 
 @router.get("/popular", response_model=List[TagResponse])
@@ -62,22 +86,15 @@ async def get_popular_tags(
 
     - **limit**: Number of tags to return
     """
-    popular_tags = await tag_service.get_popular(db, limit=limit)
-
-    # Convert to response format
-    return [
-        TagResponse(
-            id=tag.id,
-            name=tag.name,
-            slug=tag.slug,
-            description=tag.description,
-            color=tag.color,
-            created_at=tag.created_at,
-            updated_at=tag.updated_at,
-            video_count=count
+    body = _popular_tags_cache.get(limit)
+    if body is None:
+        popular_tags = await tag_service.get_popular(db, limit=limit)
+        body = _tag_list_adapter.dump_json(
+            [_tag_response(tag, count) for tag, count in popular_tags]
         )
-        for tag, count in popular_tags
-    ]
+        _popular_tags_cache.set(limit, body)
+
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/search", response_model=List[TagSimple])
@@ -106,15 +123,15 @@ async def get_tag(
 
     - **tag_id**: Tag ID
     """
-    tag = await tag_service.get_by_id(db, tag_id)
+    found = await tag_service.get_with_video_count(db, tag_id=tag_id)
 
-    if not tag:
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tag not found"
         )
 
-    return tag
+    return _tag_response(*found)
 
 
 @router.get("/slug/{slug}", response_model=TagResponse)
@@ -127,15 +144,15 @@ async def get_tag_by_slug(
 
     - **slug**: Tag slug (URL-friendly identifier)
     """
-    tag = await tag_service.get_by_slug(db, slug)
+    found = await tag_service.get_with_video_count(db, slug=slug)
 
-    if not tag:
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tag not found"
         )
 
-    return tag
+    return _tag_response(*found)
 
 
 @router.put("/{tag_id}", response_model=TagResponse)
@@ -153,16 +170,18 @@ async def update_tag(
     - **description**: New description (optional)
     - **color**: New color (optional)
     """
-    tag = await tag_service.get_by_id(db, tag_id)
+    found = await tag_service.get_with_video_count(db, tag_id=tag_id)
 
-    if not tag:
+    if not found:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Tag not found"
         )
 
+    tag, video_count = found
     tag = await tag_service.update(db, tag, tag_data)
-    return tag
+    _popular_tags_cache.clear()
+    return _tag_response(tag, video_count)
 
 
 @router.delete("/{tag_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -185,4 +204,5 @@ async def delete_tag(
         )
 
     await tag_service.delete(db, tag)
+    _popular_tags_cache.clear()
     return None
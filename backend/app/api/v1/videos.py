@@ -1,10 +1,18 @@
 import os
 import uuid
+import asyncio
+import hashlib
+import logging
 from pathlib import Path
 from typing import List, Optional
 from urllib.parse import quote
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request
-from fastapi.responses import StreamingResponse
+import aiofiles
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi import Path as PathParam
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.engine import RowMapping
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_active_user
@@ -18,9 +26,145 @@ from app.services.thumbnail_service import thumbnail_service
 from app.services.tag_service import tag_service
 from app.services import transcoding_service, hls_service
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.tasks import spawn
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Serialized JSON of the public list endpoints, keyed on the query parameters.
+# Cleared by every route that changes what a list shows; view and rating
+# counters are allowed to lag by up to the TTL.
+_video_lists_cache = TTLCache(maxsize=256, ttl=30)
+_video_list_adapter = TypeAdapter(List[VideoListResponse])
+_video_page_adapter = TypeAdapter(VideoListPaginatedResponse)
+
+
+def _invalidate_video_lists() -> None:
+    _video_lists_cache.clear()
+
+
+async def _generate_preview_clips(file_path: str, video_id: int, duration: Optional[int]) -> None:
+    """Generate hover preview clips for an uploaded video (run as a background task)"""
+    try:
+        clip_paths = await thumbnail_service.generate_preview_clips(
+            file_path,
+            video_id,
+            num_clips=7,
+            clip_duration=3,
+            duration=duration
+        )
+
+        if clip_paths:
+            logger.info(f"Generated {len(clip_paths)} preview clips for video {video_id}")
+        else:
+            logger.info(f"No preview clips generated for video {video_id}")
+    except Exception:
+        # Continue without preview clips
+        logger.exception(f"Failed to generate preview clips for video {video_id}")
+
+
+# Error factories for the most common failure paths. A fresh instance is built
+# per raise: re-raising one shared exception object would keep appending
+# traceback entries to it and pin every request frame (and its DB session).
+def _video_not_found() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+
+
+def _modify_forbidden(action: str = "modify") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"You don't have permission to {action} this video"
+    )
+
+
+def _list_item(row: RowMapping) -> VideoListResponse:
+    """Build a list item from a projected video_service list row"""
+    return VideoListResponse(**{**row, "status": row["status"].value})
+
+
+def _hls_progress_payload(video_id: int, file_path: str, progress: Optional[dict] = None) -> dict:
+    """
+    Build the HLS conversion progress payload shared by the HTTP and WebSocket endpoints.
+
+    Args:
+        video_id: Video ID
+        file_path: Path to original video
+        progress: Progress snapshot to report (default: current tracked progress)
+    """
+    if progress is None:
+        # Check if already completed
+        if hls_service.is_hls_available(file_path):
+            return {
+                "video_id": video_id,
+                "status": "completed",
+                "progress": 100,
+                "current_quality": None,
+                "total_qualities": 4,
+                "completed_qualities": 4,
+                "error": None
+            }
+
+        # Get conversion progress
+        progress = hls_service.get_conversion_progress(file_path)
+
+    if not progress:
+        return {
+            "video_id": video_id,
+            "status": "not_started",
+            "progress": 0,
+            "current_quality": None,
+            "total_qualities": 4,
+            "completed_qualities": 0,
+            "error": None
+        }
+
+    return {
+        "video_id": video_id,
+        **progress
+    }
+
+
+def _first_playlist_uri(content: bytes) -> Optional[str]:
+    """Return the first media URI in an m3u8 playlist (variant playlist or segment)"""
+    for line in content.splitlines():
+        line = line.strip()
+        if line and not line.startswith(b"#"):
+            return line.decode()
+    return None
+
+
+def _playlist_response(request: Request, content: bytes) -> Response:
+    """
+    Build an m3u8 response with an ETag so polling HLS players can be
+    answered with 304 Not Modified instead of the full playlist.
+
+    The first URI in the playlist (default variant of a master playlist,
+    first segment of a variant playlist) is advertised with a preload Link
+    header so the client can fetch it without waiting to parse the body.
+    """
+    etag = f'"{hashlib.blake2b(content, digest_size=8).hexdigest()}"'
+    headers = {
+        "Cache-Control": "public, max-age=3600",
+        "Access-Control-Allow-Origin": "*",
+        "ETag": etag
+    }
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    first_uri = _first_playlist_uri(content)
+    if first_uri and "://" not in first_uri:
+        base_path = request.url.path.rsplit("/", 1)[0]
+        headers["Link"] = f"<{base_path}/{first_uri}>; rel=preload; as=fetch; crossorigin"
+
+    return Response(
+        content=content,
+        media_type="application/vnd.apple.mpegurl",
+        headers=headers
+    )
+
 
 @router.post("/upload", response_model=VideoResponse, status_code=status.HTTP_201_CREATED)
 async def upload_video(
@@ -77,7 +221,16 @@ async def upload_video(
             detail=f"Failed to save file: {str(e)}"
         )
 
-    # Create video record
+    # Probe the file before touching the database, so no transaction (and
+    # no pooled connection) is held while ffprobe runs
+    try:
+        metadata = await video_service.extract_video_metadata(str(file_path))
+    except Exception as e:
+        print(f"Failed to extract metadata: {e}")
+        metadata = None
+
+    # Create video record and apply its metadata in one short transaction;
+    # the metadata step runs in a savepoint so a failure keeps the video row
     video_data = VideoCreate(title=title, description=description)
     video = await video_service.create(
         db=db,
@@ -87,47 +240,57 @@ async def upload_video(
         file_size=file_size
     )
 
-    # Extract metadata in background (for now, doing it synchronously)
-    try:
-        video = await video_service.update_video_metadata(db, video)
-    except Exception as e:
-        print(f"Failed to extract metadata: {e}")
-        # Video will remain in PROCESSING status
+    if metadata is not None:
+        try:
+            async with db.begin_nested():
+                video = await video_service.update_video_metadata(db, video, metadata)
+        except Exception as e:
+            print(f"Failed to save metadata: {e}")
+            # Video will remain in PROCESSING status
+            await db.refresh(video)
 
-    # Generate thumbnails
+    await db.commit()
+
+    # Generate thumbnails with no transaction open (the thumbnail directory
+    # is keyed by the new video ID), then save them in a second short one
     try:
-        thumbnail_paths = thumbnail_service.generate_thumbnails(
+        thumbnail_paths = await thumbnail_service.generate_thumbnails(
             str(file_path),
             video.id,
-            max_thumbnails=12
+            max_thumbnails=12,
+            width=video.width,
+            height=video.height,
+            duration=video.duration
         )
-
-        if thumbnail_paths:
-            await thumbnail_service.save_thumbnails_to_db(db, video, thumbnail_paths)
-            await db.refresh(video)
-        else:
-            print(f"No thumbnails generated for video {video.id}")
     except Exception as e:
         print(f"Failed to generate thumbnails: {e}")
         # Continue without thumbnails
+        thumbnail_paths = []
 
-    # Generate preview clips for hover preview
-    try:
-        clip_paths = thumbnail_service.generate_preview_clips(
-            str(file_path),
-            video.id,
-            num_clips=7,
-            clip_duration=3
+    if thumbnail_paths:
+        try:
+            async with db.begin_nested():
+                await thumbnail_service.save_thumbnails_to_db(db, video, thumbnail_paths)
+        except Exception as e:
+            print(f"Failed to save thumbnails: {e}")
+            await db.refresh(video)
+        await db.commit()
+    else:
+        print(f"No thumbnails generated for video {video.id}")
+
+    # Generate preview clips for hover preview in the background; they are
+    # only files on disk, so the upload response doesn't wait for them
+    spawn(_generate_preview_clips(str(file_path), video.id, video.duration))
+
+    # Optionally pre-transcode the stream qualities (one decode for all of them)
+    if settings.TRANSCODE_ON_UPLOAD:
+        spawn(
+            transcoding_service.transcode_all_qualities(
+                str(file_path), source_height=video.height, duration=video.duration
+            )
         )
 
-        if clip_paths:
-            print(f"Generated {len(clip_paths)} preview clips for video {video.id}")
-        else:
-            print(f"No preview clips generated for video {video.id}")
-    except Exception as e:
-        print(f"Failed to generate preview clips: {e}")
-        # Continue without preview clips
-
+    _invalidate_video_lists()
     return video
 
 
@@ -156,34 +319,21 @@ async def list_videos(
                 detail="Invalid tag_ids format. Use comma-separated integers."
             )
 
-    videos = await video_service.get_all(
-        db,
-        skip=skip,
-        limit=limit,
-        status=VideoStatus.READY,
-        tag_ids=tag_id_list
-    )
+    cache_key = ("list", skip, limit, tuple(tag_id_list or ()))
+    body = _video_lists_cache.get(cache_key)
+    if body is None:
+        videos = await video_service.get_all(
+            db,
+            skip=skip,
+            limit=limit,
+            status=VideoStatus.READY,
+            tag_ids=tag_id_list
+        )
 
-    # Transform to include uploader username
-    result = []
-    for video in videos:
-        video_dict = {
-            "id": video.id,
-            "title": video.title,
-            "description": video.description,
-            "file_size": video.file_size,
-            "thumbnail_path": video.thumbnail_path,
-            "duration": video.duration,
-            "width": video.width,
-            "height": video.height,
-            "status": video.status.value,
-            "view_count": video.view_count,
-            "created_at": video.created_at,
-            "uploader_username": video.uploader.username
-        }
-        result.append(VideoListResponse(**video_dict))
+        body = _video_list_adapter.dump_json([_list_item(row) for row in videos])
+        _video_lists_cache.set(cache_key, body)
 
-    return result
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/paginated", response_model=VideoListPaginatedResponse)
@@ -215,18 +365,16 @@ async def list_videos_paginated(
                 detail="Invalid tag_ids format. Use comma-separated integers."
             )
 
+    cache_key = ("paginated", page, page_size, tuple(tag_id_list or ()), sort_by, order)
+    body = _video_lists_cache.get(cache_key)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+
     # Calculate skip value
     skip = (page - 1) * page_size
 
-    # Get total count first
-    total = await video_service.count_all(
-        db,
-        status=VideoStatus.READY,
-        tag_ids=tag_id_list
-    )
-
-    # Then get videos
-    videos = await video_service.get_all(
+    # Get the page and the total count in one query
+    videos, total = await video_service.get_all_with_count(
         db,
         skip=skip,
         limit=page_size,
@@ -236,36 +384,22 @@ async def list_videos_paginated(
         order=order
     )
 
-    # Transform to include uploader username
-    items = []
-    for video in videos:
-        video_dict = {
-            "id": video.id,
-            "title": video.title,
-            "description": video.description,
-            "file_size": video.file_size,
-            "thumbnail_path": video.thumbnail_path,
-            "duration": video.duration,
-            "width": video.width,
-            "height": video.height,
-            "status": video.status.value,
-            "view_count": video.view_count,
-            "created_at": video.created_at,
-            "uploader_username": video.uploader.username
-        }
-        items.append(VideoListResponse(**video_dict))
+    items = [_list_item(row) for row in videos]
 
     # Calculate total pages
     import math
     total_pages = math.ceil(total / page_size) if total > 0 else 0
 
-    return VideoListPaginatedResponse(
+    body = _video_page_adapter.dump_json(VideoListPaginatedResponse(
         items=items,
         total=total,
         page=page,
         page_size=page_size,
         total_pages=total_pages
-    )
+    ))
+    _video_lists_cache.set(cache_key, body)
+
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/search", response_model=List[VideoListResponse])
@@ -337,24 +471,7 @@ async def search_videos(
         exclude_tags=parsed_exclude_tags
     )
 
-    # Format response
-    result = []
-    for video in videos:
-        video_dict = {
-            "id": video.id,
-            "title": video.title,
-            "description": video.description,
-            "file_size": video.file_size,
-            "thumbnail_path": video.thumbnail_path,
-            "duration": video.duration,
-            "width": video.width,
-            "height": video.height,
-            "status": video.status.value,
-            "view_count": video.view_count,
-            "created_at": video.created_at,
-            "uploader_username": video.uploader.username
-        }
-        result.append(VideoListResponse(**video_dict))
+    result = [_list_item(row) for row in videos]
 
     return result
 
@@ -388,10 +505,7 @@ async def get_video(
     """
     video = await video_service.get_by_id(db, video_id)
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
     return video
 
 
@@ -407,14 +521,8 @@ async def increment_view(
 
     This endpoint should be called once when the video player starts playing.
     """
-    video = await video_service.get_by_id(db, video_id)
-    if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
-
-    await video_service.increment_view_count(db, video)
+    if not await video_service.increment_view_count(db, video_id):
+        raise _video_not_found()
     return None
 
 
@@ -439,10 +547,7 @@ async def stream_video(
     """
     video = await video_service.get_by_id(db, video_id)
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     if video.status != VideoStatus.READY:
         raise HTTPException(
@@ -462,7 +567,10 @@ async def stream_video(
     video_file_path = await transcoding_service.get_video_for_quality(
         original_path=video.file_path,
         quality=quality,
-        transcode_in_background=True  # Background transcoding for better UX
+        transcode_in_background=True,  # Background transcoding for better UX
+        width=video.width,
+        height=video.height,
+        duration=video.duration
     )
 
     if not video_file_path or not os.path.exists(video_file_path):
@@ -479,7 +587,7 @@ async def stream_video(
 
     # Increment view count (only on initial request, not on range requests)
     if not range_header:
-        await video_service.increment_view_count(db, video)
+        await video_service.increment_view_count(db, video.id)
 
     # URL encode filename for Content-Disposition header
     encoded_filename = quote(f"{video.title}{Path(video.file_path).suffix}")
@@ -562,10 +670,7 @@ async def get_video_qualities(
     """
     video = await video_service.get_by_id(db, video_id)
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     if not os.path.exists(video.file_path):
         raise HTTPException(
@@ -574,7 +679,7 @@ async def get_video_qualities(
         )
 
     # Get available qualities
-    qualities = transcoding_service.get_available_qualities(video.file_path)
+    qualities = await transcoding_service.get_available_qualities(video.file_path)
 
     return {
         "video_id": video_id,
@@ -598,19 +703,14 @@ async def update_video(
     """
     video = await video_service.get_by_id(db, video_id)
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Check ownership
     if video.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to update this video"
-        )
+        raise _modify_forbidden("update")
 
     video = await video_service.update(db, video, video_data)
+    _invalidate_video_lists()
     return video
 
 
@@ -627,19 +727,14 @@ async def delete_video(
     """
     video = await video_service.get_by_id(db, video_id)
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Check ownership
     if video.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to delete this video"
-        )
+        raise _modify_forbidden("delete")
 
     await video_service.delete(db, video)
+    _invalidate_video_lists()
     return None
 
 
@@ -665,10 +760,7 @@ async def get_video_thumbnails(
     video = result.scalar_one_or_none()
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     return video.thumbnails
 
@@ -686,32 +778,20 @@ async def select_thumbnail(
     - **video_id**: Video ID
     - **thumbnail_id**: ID of thumbnail to select
     """
-    from sqlalchemy.orm import selectinload
-    from sqlalchemy import select
-    from app.models.video import Video
-
-    result = await db.execute(
-        select(Video).options(selectinload(Video.thumbnails)).where(Video.id == video_id)
-    )
-    video = result.scalar_one_or_none()
+    video = await video_service.get_by_id(db, video_id)
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Check ownership
     if video.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to modify this video"
-        )
+        raise _modify_forbidden()
 
     try:
         selected_thumbnail = await thumbnail_service.select_thumbnail(
             db, video, data.thumbnail_id
         )
+        _invalidate_video_lists()
         return selected_thumbnail
     except ValueError as e:
         raise HTTPException(
@@ -762,17 +842,11 @@ async def upload_custom_thumbnail(
     video = result.scalar_one_or_none()
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Check ownership
     if video.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to modify this video"
-        )
+        raise _modify_forbidden()
 
     # Create thumbnails directory
     thumbnails_dir = Path(settings.UPLOAD_DIR) / "thumbnails" / str(video_id)
@@ -821,7 +895,6 @@ async def get_thumbnail_image(
     """
     from sqlalchemy import select
     from app.models.video_thumbnail import VideoThumbnail
-    from fastapi.responses import FileResponse
 
     result = await db.execute(
         select(VideoThumbnail).where(
@@ -874,16 +947,12 @@ async def get_selected_thumbnail(
     """
     from sqlalchemy import select
     from app.models.video import Video
-    from fastapi.responses import FileResponse
 
     result = await db.execute(select(Video).where(Video.id == video_id))
     video = result.scalar_one_or_none()
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     if not video.thumbnail_path or not os.path.exists(video.thumbnail_path):
         raise HTTPException(
@@ -935,10 +1004,7 @@ async def get_preview_clips(
     video = result.scalar_one_or_none()
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Check for preview clips in thumbnails directory
     clips_dir = Path(settings.UPLOAD_DIR) / "thumbnails" / str(video_id)
@@ -959,7 +1025,7 @@ async def get_preview_clips(
 @router.get("/{video_id}/preview-clips/{clip_number}")
 async def get_preview_clip(
     video_id: int,
-    clip_number: int,
+    clip_number: int = PathParam(..., ge=1, le=7, description="Clip number (1-7)"),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -973,23 +1039,12 @@ async def get_preview_clip(
     """
     from sqlalchemy import select
     from app.models.video import Video
-    from fastapi.responses import FileResponse
-
-    # Validate clip number
-    if clip_number < 1 or clip_number > 7:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Clip number must be between 1 and 7"
-        )
 
     result = await db.execute(select(Video).where(Video.id == video_id))
     video = result.scalar_one_or_none()
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Get clip file path
     clips_dir = Path(settings.UPLOAD_DIR) / "thumbnails" / str(video_id)
@@ -1033,10 +1088,7 @@ async def get_video_tags(
     video = result.scalar_one_or_none()
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     return video.tags
 
@@ -1054,29 +1106,17 @@ async def add_tags_to_video(
     - **video_id**: Video ID
     - **tag_ids**: List of tag IDs to add
     """
-    from sqlalchemy.orm import selectinload
-    from sqlalchemy import select
-    from app.models.video import Video
-
-    result = await db.execute(
-        select(Video).options(selectinload(Video.tags)).where(Video.id == video_id)
-    )
-    video = result.scalar_one_or_none()
+    video = await video_service.get_by_id(db, video_id)
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Check ownership
     if video.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to modify this video"
-        )
+        raise _modify_forbidden()
 
     tags = await tag_service.add_tags_to_video(db, video, tag_data.tag_ids)
+    _invalidate_video_lists()
     return tags
 
 
@@ -1093,29 +1133,17 @@ async def update_video_tags(
     - **video_id**: Video ID
     - **tag_ids**: List of tag IDs (replaces all existing)
     """
-    from sqlalchemy.orm import selectinload
-    from sqlalchemy import select
-    from app.models.video import Video
-
-    result = await db.execute(
-        select(Video).options(selectinload(Video.tags)).where(Video.id == video_id)
-    )
-    video = result.scalar_one_or_none()
+    video = await video_service.get_by_id(db, video_id)
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Check ownership
     if video.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to modify this video"
-        )
+        raise _modify_forbidden()
 
     tags = await tag_service.set_video_tags(db, video, tag_data.tag_ids)
+    _invalidate_video_lists()
     return tags
 
 
@@ -1132,29 +1160,17 @@ async def remove_tag_from_video(
     - **video_id**: Video ID
     - **tag_id**: Tag ID to remove
     """
-    from sqlalchemy.orm import selectinload
-    from sqlalchemy import select
-    from app.models.video import Video
-
-    result = await db.execute(
-        select(Video).options(selectinload(Video.tags)).where(Video.id == video_id)
-    )
-    video = result.scalar_one_or_none()
+    video = await video_service.get_by_id(db, video_id)
 
     if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+        raise _video_not_found()
 
     # Check ownership
     if video.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You don't have permission to modify this video"
-        )
+        raise _modify_forbidden()
 
     tags = await tag_service.remove_tags_from_video(db, video, [tag_id])
+    _invalidate_video_lists()
     return tags
 
 
@@ -1165,7 +1181,7 @@ async def remove_tag_from_video(
 @router.post("/{video_id}/convert-hls", status_code=status.HTTP_202_ACCEPTED)
 async def convert_video_to_hls(
     video_id: int,
-    qualities: Optional[List[str]] = Query(None, description="Qualities to generate (default: 480p, 720p, 1080p)"),
+    qualities: Optional[List[hls_service.QualityType]] = Query(None, description="Qualities to generate (default: 480p, 720p, 1080p)"),
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -1176,35 +1192,26 @@ async def convert_video_to_hls(
     - **video_id**: Video ID
     - **qualities**: Optional list of qualities (480p, 720p, 1080p, 4k)
     """
-    from sqlalchemy import select
-    from app.models.video import Video
-
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-
-    if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+    file_path = await video_service.get_file_path(db, video_id)
+    if file_path is None:
+        raise _video_not_found()
 
     # Check if video file exists
-    if not os.path.exists(video.file_path):
+    if not os.path.exists(file_path):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Video file not found"
         )
 
     # Check if already converted
-    if hls_service.is_hls_available(video.file_path):
+    if hls_service.is_hls_available(file_path):
         return {
             "message": "HLS conversion already completed",
-            "available_qualities": hls_service.get_available_hls_qualities(video.file_path)
+            "available_qualities": hls_service.get_available_hls_qualities(file_path)
         }
 
     # Start background conversion
-    import asyncio
-    asyncio.create_task(hls_service.convert_video_to_hls(video.file_path, qualities))
+    spawn(hls_service.convert_video_to_hls(file_path, qualities))
 
     return {
         "message": "HLS conversion started",
@@ -1216,68 +1223,47 @@ async def convert_video_to_hls(
 @router.get("/{video_id}/hls/master.m3u8")
 async def get_hls_master_playlist(
     video_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get HLS master playlist for a video.
     This playlist references all available quality levels.
     """
-    from sqlalchemy import select
-    from app.models.video import Video
+    file_path = await video_service.get_file_path(db, video_id)
+    if file_path is None:
+        raise _video_not_found()
 
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
+    master_path = hls_service.get_master_playlist_path(file_path)
 
-    if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
-
-    master_path = hls_service.get_master_playlist_path(video.file_path)
-
-    if not os.path.exists(master_path):
+    if not hls_service.is_hls_available(file_path):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="HLS conversion not available. Use /convert-hls endpoint first."
         )
 
     # Return m3u8 file
-    with open(master_path, 'r') as f:
-        content = f.read()
+    async with aiofiles.open(master_path, 'rb') as f:
+        content = await f.read()
 
-    return StreamingResponse(
-        iter([content]),
-        media_type="application/vnd.apple.mpegurl",
-        headers={
-            "Cache-Control": "public, max-age=3600",
-            "Access-Control-Allow-Origin": "*"
-        }
-    )
+    return _playlist_response(request, content)
 
 
 @router.get("/{video_id}/hls/{quality}/playlist.m3u8")
 async def get_hls_quality_playlist(
     video_id: int,
-    quality: str,
+    quality: hls_service.QualityType,
+    request: Request,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get HLS playlist for a specific quality level.
     """
-    from sqlalchemy import select
-    from app.models.video import Video
-
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-
-    if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+    file_path = await video_service.get_file_path(db, video_id)
+    if file_path is None:
+        raise _video_not_found()
 
-    playlist_path = hls_service.get_quality_playlist_path(video.file_path, quality)
+    playlist_path = hls_service.get_quality_playlist_path(file_path, quality)
 
     if not os.path.exists(playlist_path):
         raise HTTPException(
@@ -1285,57 +1271,38 @@ async def get_hls_quality_playlist(
             detail=f"Quality '{quality}' not available"
         )
 
-    with open(playlist_path, 'r') as f:
-        content = f.read()
+    async with aiofiles.open(playlist_path, 'rb') as f:
+        content = await f.read()
 
-    return StreamingResponse(
-        iter([content]),
-        media_type="application/vnd.apple.mpegurl",
-        headers={
-            "Cache-Control": "public, max-age=3600",
-            "Access-Control-Allow-Origin": "*"
-        }
-    )
+    return _playlist_response(request, content)
 
 
 @router.get("/{video_id}/hls/{quality}/{segment}")
 async def get_hls_segment(
     video_id: int,
-    quality: str,
+    quality: hls_service.QualityType,
     segment: str,
     db: AsyncSession = Depends(get_db)
 ):
     """
     Get HLS segment file (.ts).
     """
-    from sqlalchemy import select
-    from app.models.video import Video
-
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-
-    if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
+    file_path = await video_service.get_file_path(db, video_id)
+    if file_path is None:
+        raise _video_not_found()
 
-    hls_dir = hls_service.get_hls_directory(video.file_path)
+    hls_dir = hls_service.get_hls_directory(file_path)
     segment_path = hls_dir / quality / segment
 
-    if not segment_path.exists():
+    if not hls_service.segment_exists(segment_path):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Segment not found"
         )
 
-    # Stream segment file
-    def iterfile():
-        with open(segment_path, 'rb') as f:
-            yield from f
-
-    return StreamingResponse(
-        iterfile(),
+    # FileResponse reads the segment in a worker thread with a fixed chunk size
+    return FileResponse(
+        segment_path,
         media_type="video/MP2T",
         headers={
             "Cache-Control": "public, max-age=31536000",  # 1 year cache
@@ -1352,20 +1319,12 @@ async def get_hls_status(
     """
     Check HLS conversion status for a video.
     """
-    from sqlalchemy import select
-    from app.models.video import Video
+    file_path = await video_service.get_file_path(db, video_id)
+    if file_path is None:
+        raise _video_not_found()
 
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-
-    if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
-
-    is_available = hls_service.is_hls_available(video.file_path)
-    available_qualities = hls_service.get_available_hls_qualities(video.file_path)
+    is_available = hls_service.is_hls_available(file_path)
+    available_qualities = hls_service.get_available_hls_qualities(file_path)
 
     return {
         "video_id": video_id,
@@ -1391,45 +1350,49 @@ async def get_hls_conversion_progress(
     - completed_qualities: Number of completed qualities
     - error: Error message if failed
     """
-    from sqlalchemy import select
-    from app.models.video import Video
+    file_path = await video_service.get_file_path(db, video_id)
+    if file_path is None:
+        raise _video_not_found()
 
-    result = await db.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
+    return _hls_progress_payload(video_id, file_path)
 
-    if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
 
-    # Check if already completed
-    if hls_service.is_hls_available(video.file_path):
-        return {
-            "video_id": video_id,
-            "status": "completed",
-            "progress": 100,
-            "current_quality": None,
-            "total_qualities": 4,
-            "completed_qualities": 4,
-            "error": None
-        }
+@router.websocket("/{video_id}/hls/progress/ws")
+async def hls_conversion_progress_ws(websocket: WebSocket, video_id: int):
+    """
+    Push HLS conversion progress for a video over a WebSocket.
 
-    # Get conversion progress
-    progress = hls_service.get_conversion_progress(video.file_path)
+    Sends the current state on connect, then one message per progress update
+    (same payload as GET /hls/progress). The server closes the socket once the
+    conversion is completed or failed.
+    """
+    from app.core.database import AsyncSessionLocal
 
-    if not progress:
-        return {
-            "video_id": video_id,
-            "status": "not_started",
-            "progress": 0,
-            "current_quality": None,
-            "total_qualities": 4,
-            "completed_qualities": 0,
-            "error": None
-        }
+    # Short-lived session: don't hold a pooled connection for the socket's lifetime
+    async with AsyncSessionLocal() as db:
+        file_path = await video_service.get_file_path(db, video_id)
 
-    return {
-        "video_id": video_id,
-        **progress
-    }
+    if file_path is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Video not found")
+        return
+
+    await websocket.accept()
+    queue = hls_service.subscribe_progress(file_path)
+    try:
+        payload = _hls_progress_payload(video_id, file_path)
+        await websocket.send_json(jsonable_encoder(payload))
+
+        while payload["status"] not in ("completed", "failed"):
+            try:
+                progress = await asyncio.wait_for(queue.get(), timeout=30)
+                payload = _hls_progress_payload(video_id, file_path, progress)
+            except asyncio.TimeoutError:
+                # Heartbeat; also surfaces a vanished client on the send
+                payload = _hls_progress_payload(video_id, file_path)
+            await websocket.send_json(jsonable_encoder(payload))
+
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hls_service.unsubscribe_progress(file_path, queue)
@@ -1,5 +1,7 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_active_user
@@ -11,9 +13,15 @@ from app.schemas.watch_history import (
 )
 from app.services.watch_history_service import watch_history_service
 from app.services.video_service import video_service
+from app.core.cache import TTLCache
 
 router = APIRouter()
 
+# Serialized continue-watching lists: user_id -> {limit: JSON bytes}.
+# Dropped whenever the user's watch history changes.
+_continue_watching_cache = TTLCache(maxsize=1024, ttl=30)
+_continue_watching_adapter = TypeAdapter(List[ContinueWatchingItem])
+
 
 @router.post("/{video_id}/watch-history", response_model=WatchHistoryResponse)
 async def save_watch_progress(
@@ -32,14 +40,7 @@ async def save_watch_progress(
     This endpoint saves the user's current playback position.
     Call this periodically (e.g., every 10 seconds) while the video is playing.
     """
-    # Check if video exists
-    video = await video_service.get_by_id(db, video_id)
-    if not video:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Video not found"
-        )
-
+    # Video existence is enforced by the upsert itself (foreign key)
     try:
         history = await watch_history_service.save_or_update_watch_history(
             db=db,
@@ -47,11 +48,12 @@ async def save_watch_progress(
             video_id=video_id,
             watch_data=watch_data
         )
+        _continue_watching_cache.invalidate(current_user.id)
 
         return history
     except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
 
@@ -107,13 +109,21 @@ async def get_continue_watching(
     Returns a list of videos that the user has started watching but not completed.
     Ordered by last watched date (most recent first).
     """
-    items = await watch_history_service.get_continue_watching_list(
-        db=db,
-        user_id=current_user.id,
-        limit=limit
-    )
+    cached = _continue_watching_cache.get(current_user.id)
+    if cached is None:
+        cached = {}
+        _continue_watching_cache.set(current_user.id, cached)
+
+    body = cached.get(limit)
+    if body is None:
+        items = await watch_history_service.get_continue_watching_list(
+            db=db,
+            user_id=current_user.id,
+            limit=limit
+        )
+        body = cached[limit] = _continue_watching_adapter.dump_json(items)
 
-    return items
+    return Response(content=body, media_type="application/json")
 
 
 @router.delete("/{video_id}/watch-history", status_code=status.HTTP_204_NO_CONTENT)
@@ -140,5 +150,6 @@ async def delete_watch_progress(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No watch history found for this video"
         )
+    _continue_watching_cache.invalidate(current_user.id)
 
     return None
@@ -17,6 +17,10 @@ class Settings(BaseSettings):
     # Database Settings
     DATABASE_URL: str
     DATABASE_ECHO: bool = False
+    DATABASE_POOL_SIZE: int = 10  # connections kept open (and pre-warmed at startup)
+    DATABASE_MAX_OVERFLOW: int = 10  # extra connections allowed under bursts
+    DATABASE_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DATABASE_POOL_RECYCLE: int = 1800  # seconds before a connection is replaced
 
     # Security Settings
     SECRET_KEY: str
@@ -37,6 +41,14 @@ class Settings(BaseSettings):
     # Video Processing Settings
     FFMPEG_PATH: str = "/usr/bin/ffmpeg"
     FFPROBE_PATH: str = "/usr/bin/ffprobe"
+    FFMPEG_CPU_LIST: str = ""  # taskset CPU list for encodes, e.g. "2,3" (empty = no pinning)
+    FFMPEG_NICE: int = 10  # niceness for encodes (0 = inherit)
+    FFMPEG_THREADS: int = 0  # encoder threads (0 = size of FFMPEG_CPU_LIST, else ffmpeg default)
+    TRANSCODE_CONCURRENCY: int = 0  # on-demand quality transcodes run at once (0 = encode CPUs / 4, at least 1)
+    TRANSCODE_TIMEOUT_FACTOR: float = 4.0  # kill a quality transcode after duration × this seconds (at least 60)
+    TRANSCODE_ON_UPLOAD: bool = False  # pre-transcode 480p/720p/1080p in one ffmpeg pass after upload
+    HLS_ENCODER: str = "libx264"  # HLS and quality transcodes: libx264 | h264_nvenc | h264_qsv | h264_v4l2m2m
+    FFMPEG_HWACCEL: str = ""  # -hwaccel for thumbnail/preview/transcode decoding, e.g. "auto", "cuda", "qsv" (empty = software)
     THUMBNAIL_WIDTH: int = 320
     THUMBNAIL_HEIGHT: int = 180
     MAX_THUMBNAILS_PER_VIDEO: int = 15
@@ -51,6 +63,7 @@ class Settings(BaseSettings):
     SMTP_PORT: int = 1025
     SMTP_USER: str = ""
     SMTP_PASSWORD: str = ""
+    SMTP_POOL_SIZE: int = 2  # concurrent SMTP connections kept open for reuse
     SMTP_FROM_EMAIL: str = "noreply@streamflix.com"
     SMTP_FROM_NAME: str = "StreamFlix"
     EMAIL_VERIFICATION_EXPIRE_HOURS: int = 24
@@ -1,12 +1,19 @@
+import asyncio
+
+from sqlalchemy import func, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
 
-# Create async engine
+# Create async engine (async engines default to AsyncAdaptedQueuePool)
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.DATABASE_ECHO,
     future=True,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    pool_recycle=settings.DATABASE_POOL_RECYCLE,
     pool_pre_ping=True,
 )
 
@@ -23,6 +30,25 @@ AsyncSessionLocal = async_sessionmaker(
 Base = declarative_base()
 
 
+def utc_now():
+    """SQL expression for the current UTC time as a naive timestamp (matches datetime.utcnow)"""
+    return func.timezone("utc", func.now())
+
+
+async def warm_pool() -> None:
+    """
+    Open every pooled connection up front.
+
+    The pool has no minimum size, so without this the first burst of
+    requests after startup pays for connection setup one by one.
+    """
+    async def ping() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(settings.DATABASE_POOL_SIZE)))
+
+
 # Dependency for getting DB session
 async def get_db() -> AsyncSession:
     async with AsyncSessionLocal() as session:
@@ -0,0 +1,183 @@
+"""
+Helpers for launching CPU-heavy ffmpeg encodes without starving the API
+"""
+import asyncio
+import logging
+import os
+import shutil
+from functools import lru_cache
+from typing import List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rate-control options per supported H.264 encoder (bitrate is added per quality)
+VIDEO_ENCODER_OPTIONS = {
+    "libx264": ["-preset", "medium", "-crf", "23"],
+    "h264_nvenc": ["-preset", "p4", "-rc", "vbr"],
+    "h264_qsv": ["-preset", "medium"],
+    "h264_v4l2m2m": ["-pix_fmt", "yuv420p"],  # Raspberry Pi hardware encoder
+}
+
+# Hover preview clips are tiny: libx264 keeps constant quality, hardware
+# encoders (no CRF) get a small fixed bitrate instead
+PREVIEW_CLIP_BITRATE = "400k"
+
+# Encoder picked by resolve_video_encoder, probed once per process
+_video_encoder: Optional[str] = None
+_video_encoder_lock = asyncio.Lock()
+
+
+def _cpu_count(cpu_list: str) -> int:
+    """Count CPUs in a taskset-style list, e.g. "2,3" or "1-3" -> 3"""
+    count = 0
+    for part in cpu_list.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            count += int(end) - int(start) + 1
+        else:
+            count += 1
+    return count
+
+
+@lru_cache(maxsize=None)
+def _which(tool: str) -> bool:
+    return shutil.which(tool) is not None
+
+
+def encode_command(args: List[str]) -> List[str]:
+    """
+    Build an ffmpeg encode command confined to the configured CPU set and niceness.
+
+    Args:
+        args: ffmpeg arguments (without the ffmpeg binary itself)
+
+    Returns:
+        Full argv: [taskset -c CPUS] [nice -n N] FFMPEG_PATH args...
+    """
+    command: List[str] = []
+
+    if settings.FFMPEG_CPU_LIST and _which("taskset"):
+        command += ["taskset", "-c", settings.FFMPEG_CPU_LIST]
+
+    if settings.FFMPEG_NICE and _which("nice"):
+        command += ["nice", "-n", str(settings.FFMPEG_NICE)]
+
+    return command + [settings.FFMPEG_PATH] + args
+
+
+def encode_cpu_count() -> int:
+    """Number of CPUs encodes may use (FFMPEG_CPU_LIST, else all)"""
+    if settings.FFMPEG_CPU_LIST:
+        return max(1, _cpu_count(settings.FFMPEG_CPU_LIST))
+    return os.cpu_count() or 1
+
+
+def encoder_thread_args(jobs: int = 1) -> List[str]:
+    """
+    Encoder thread count matching the ffmpeg CPU set.
+
+    Args:
+        jobs: Number of encodes that may share the CPU set at once; the
+            CPUs are split between them
+
+    Returns:
+        ["-threads", N] to place before the output, or [] to let ffmpeg decide
+    """
+    threads = settings.FFMPEG_THREADS
+    if not threads and (settings.FFMPEG_CPU_LIST or jobs > 1):
+        threads = max(1, encode_cpu_count() // jobs)
+    return ["-threads", str(threads)] if threads else []
+
+
+async def _probe_encoder(encoder: str) -> bool:
+    """Check `ffmpeg -encoders` for the given encoder"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            settings.FFMPEG_PATH, "-hide_banner", "-encoders",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+    except OSError:
+        return False
+
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout=10)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return False
+    return f" {encoder} " in stdout.decode(errors="replace")
+
+
+async def resolve_video_encoder() -> str:
+    """
+    Get the H.264 encoder to use, falling back to libx264.
+
+    The configured HLS_ENCODER is checked once against `ffmpeg -encoders`
+    and the result is reused for the life of the process; concurrent
+    first callers share that one probe.
+    """
+    global _video_encoder
+    if _video_encoder is not None:
+        return _video_encoder
+
+    async with _video_encoder_lock:
+        if _video_encoder is not None:
+            return _video_encoder
+
+        encoder = settings.HLS_ENCODER
+        if encoder not in VIDEO_ENCODER_OPTIONS:
+            logger.warning(f"Unsupported HLS_ENCODER '{encoder}', using libx264")
+            encoder = "libx264"
+        elif encoder != "libx264" and not await _probe_encoder(encoder):
+            logger.warning(f"ffmpeg has no {encoder} encoder, using libx264")
+            encoder = "libx264"
+
+        _video_encoder = encoder
+        return encoder
+
+
+def hwaccel_args() -> List[str]:
+    """
+    Input-side hardware decoding arguments, to place before -i.
+
+    Decoded frames are downloaded to system memory, so software filters
+    (select, scale) keep working; ffmpeg falls back to software decoding
+    if the device can't be opened.
+    """
+    return ["-hwaccel", settings.FFMPEG_HWACCEL] if settings.FFMPEG_HWACCEL else []
+
+
+def video_encoder_args(encoder: str, bitrate: str) -> List[str]:
+    """
+    Video codec arguments for an encoder returned by resolve_video_encoder.
+
+    Args:
+        encoder: Encoder name
+        bitrate: Target video bitrate (e.g. "2500k")
+    """
+    return ["-c:v", encoder, *VIDEO_ENCODER_OPTIONS[encoder], "-b:v", bitrate]
+
+
+def transcode_encoder_args(encoder: str, bitrate: str) -> List[str]:
+    """
+    Video codec arguments for on-demand quality transcodes.
+
+    Viewers wait on these, so libx264 trades a little size for speed
+    (veryfast instead of the HLS medium preset).
+    """
+    if encoder == "libx264":
+        return ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-b:v", bitrate]
+    return video_encoder_args(encoder, bitrate)
+
+
+def preview_encoder_args(encoder: str) -> List[str]:
+    """Video codec arguments for hover preview clips"""
+    if encoder == "libx264":
+        return ["-c:v", "libx264", "-preset", "veryfast", "-crf", "28"]
+    return video_encoder_args(encoder, PREVIEW_CLIP_BITRATE)
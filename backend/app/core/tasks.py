@@ -0,0 +1,32 @@
+"""
+Fire-and-forget background tasks that stay referenced until they finish
+"""
+import asyncio
+import logging
+from typing import Any, Coroutine
+
+logger = logging.getLogger(__name__)
+
+# The event loop only keeps weak references to tasks; holding them here
+# stops a running background job from being garbage-collected mid-run
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _task_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Background task {task.get_name()} failed", exc_info=task.exception())
+
+
+def spawn(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    """
+    Run a coroutine in the background without awaiting it.
+
+    The task is kept referenced until it completes, and an exception it
+    raises is logged instead of surfacing as "Task exception was never
+    retrieved".
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_task_done)
+    return task
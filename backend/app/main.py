@@ -1,12 +1,31 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
+from app.core.database import engine, warm_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Pre-warm the DB pool on startup and close it on shutdown"""
+    try:
+        await warm_pool()
+    except Exception as e:
+        # The pool still connects lazily; don't block startup on a DB hiccup
+        print(f"Failed to pre-warm database pool: {e}")
+    yield
+    await engine.dispose()
+
 
 # Create FastAPI application
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # CORS Middleware
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Table, Column, Integer, ForeignKey, DateTime, Index
 from datetime import datetime
 from app.core.database import Base
 
@@ -9,4 +9,6 @@ video_tags = Table(
     Column("video_id", Integer, ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True),
     Column("tag_id", Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True),
     Column("created_at", DateTime, default=datetime.utcnow, nullable=False),
+    # The primary key leads with video_id; tag filters and per-tag counts go by tag_id
+    Index("ix_video_tags_tag_video", "tag_id", "video_id"),
 )
@@ -21,7 +21,7 @@ class Category(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    videos = relationship("Video", back_populates="category")
+    videos = relationship("Video", back_populates="category", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<Category(id={self.id}, name={self.name}, slug={self.slug})>"
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -31,6 +31,8 @@ class Rating(Base):
         UniqueConstraint('user_id', 'video_id', name='uq_user_video_rating'),
         # 평점은 1-5 사이만 허용
         CheckConstraint('score >= 1 AND score <= 5', name='check_rating_score'),
+        # Covers the per-video AVG(score)/COUNT refresh with an index-only scan
+        Index('ix_ratings_video_score', 'video_id', 'score'),
     )
 
     def __repr__(self):
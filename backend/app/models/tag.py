@@ -21,7 +21,7 @@ class Tag(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    videos = relationship("Video", secondary="video_tags", back_populates="tags")
+    videos = relationship("Video", secondary="video_tags", back_populates="tags", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<Tag(id={self.id}, name={self.name}, slug={self.slug})>"
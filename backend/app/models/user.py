@@ -1,6 +1,6 @@
 import enum
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Index, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -35,9 +35,18 @@ class User(Base):
     last_login = Column(DateTime, nullable=True)
 
     # Relationships
-    videos = relationship("Video", back_populates="uploader", cascade="all, delete-orphan")
-    ratings = relationship("Rating", back_populates="user", cascade="all, delete-orphan")
-    watch_history = relationship("WatchHistory", back_populates="user", cascade="all, delete-orphan")
+    videos = relationship("Video", back_populates="uploader", cascade="all, delete-orphan", lazy="raise_on_sql")
+    ratings = relationship("Rating", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql")
+    watch_history = relationship("WatchHistory", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql")
+
+    # Indexes
+    __table_args__ = (
+        # Case-insensitive login/registration lookups (UserService.get_by_*)
+        Index('ix_users_email_lower', func.lower(email), unique=True),
+        Index('ix_users_username_lower', func.lower(username), unique=True),
+        # Video search matches ILIKE '%q%' on username (pg_trgm)
+        Index('ix_users_username_trgm', 'username', postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}),
+    )
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, role={self.role})>"
@@ -1,8 +1,18 @@
 import enum
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, ForeignKey, BigInteger, Float
-from sqlalchemy.orm import relationship
-from app.core.database import Base
+from typing import TYPE_CHECKING, List, Optional
+from sqlalchemy import Integer, SmallInteger, String, Text, DateTime, ForeignKey, BigInteger, Float, Index, CheckConstraint
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.core.database import Base, utc_now
+
+if TYPE_CHECKING:
+    from app.models.category import Category
+    from app.models.rating import Rating
+    from app.models.tag import Tag
+    from app.models.user import User
+    from app.models.video_thumbnail import VideoThumbnail
+    from app.models.watch_history import WatchHistory
 
 
 class VideoStatus(str, enum.Enum):
@@ -13,47 +23,98 @@ class VideoStatus(str, enum.Enum):
     DELETED = "deleted"  # Soft deleted
 
 
+# On-disk codes for VideoStatus; append new statuses, never renumber
+_STATUS_TO_CODE = {
+    VideoStatus.PROCESSING: 0,
+    VideoStatus.READY: 1,
+    VideoStatus.FAILED: 2,
+    VideoStatus.DELETED: 3,
+}
+_CODE_TO_STATUS = {code: status for status, code in _STATUS_TO_CODE.items()}
+
+
+class VideoStatusType(TypeDecorator):
+    """Stores VideoStatus as a SMALLINT code, exposes it as VideoStatus"""
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return _STATUS_TO_CODE[VideoStatus(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return _CODE_TO_STATUS[value]
+
+
 class Video(Base):
     """Video model for storing video metadata"""
     __tablename__ = "videos"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     # Video metadata
-    title = Column(String(255), nullable=False, index=True)
-    description = Column(Text, nullable=True)
-    file_path = Column(String(500), nullable=False)  # Path to video file
-    file_size = Column(BigInteger, nullable=True)  # File size in bytes
-    thumbnail_path = Column(String(500), nullable=True)  # Path to selected thumbnail
+    title: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    file_path: Mapped[str] = mapped_column(String(500), nullable=False)  # Path to video file
+    file_size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)  # File size in bytes
+    thumbnail_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)  # Path to selected thumbnail
 
     # Video properties
-    duration = Column(Integer, nullable=True)  # Duration in seconds
-    width = Column(Integer, nullable=True)  # Video width in pixels
-    height = Column(Integer, nullable=True)  # Video height in pixels
-    fps = Column(Float, nullable=True)  # Frames per second
-    codec = Column(String(50), nullable=True)  # Video codec
-    bitrate = Column(Integer, nullable=True)  # Bitrate in kbps
+    duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Duration in seconds
+    width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Video width in pixels
+    height: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Video height in pixels
+    fps: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # Frames per second
+    codec: Mapped[Optional[str]] = mapped_column(String(50), nullable=True)  # Video codec
+    bitrate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Bitrate in kbps
 
     # Processing status
-    status = Column(Enum(VideoStatus), default=VideoStatus.PROCESSING, nullable=False, index=True)
+    status: Mapped[VideoStatus] = mapped_column(VideoStatusType(), default=VideoStatus.PROCESSING, nullable=False, index=True)
 
     # View count
-    view_count = Column(Integer, default=0, nullable=False)
+    view_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    # Rating aggregates, kept in sync by rating_service on every rating write
+    avg_rating: Mapped[float] = mapped_column(Float, default=0.0, server_default="0", nullable=False)
+    rating_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
-    published_at = Column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=utc_now(), nullable=False, index=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=utc_now(), onupdate=utc_now(), nullable=False)
+    published_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
 
     # Relationships
-    uploader = relationship("User", back_populates="videos")
-    thumbnails = relationship("VideoThumbnail", back_populates="video", cascade="all, delete-orphan")
-    ratings = relationship("Rating", back_populates="video", cascade="all, delete-orphan")
-    watch_history = relationship("WatchHistory", back_populates="video", cascade="all, delete-orphan")
-    tags = relationship("Tag", secondary="video_tags", back_populates="videos")
-    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
-    category = relationship("Category", back_populates="videos")
+    uploader: Mapped["User"] = relationship("User", back_populates="videos")
+    thumbnails: Mapped[List["VideoThumbnail"]] = relationship("VideoThumbnail", back_populates="video", cascade="all, delete-orphan", lazy="raise_on_sql")
+    ratings: Mapped[List["Rating"]] = relationship("Rating", back_populates="video", cascade="all, delete-orphan")
+    watch_history: Mapped[List["WatchHistory"]] = relationship("WatchHistory", back_populates="video", cascade="all, delete-orphan")
+    tags: Mapped[List["Tag"]] = relationship("Tag", secondary="video_tags", back_populates="videos", lazy="raise_on_sql")
+    category_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
+    category: Mapped[Optional["Category"]] = relationship("Category", back_populates="videos")
+
+    # Indexes
+    __table_args__ = (
+        CheckConstraint(f"status BETWEEN 0 AND {len(_STATUS_TO_CODE) - 1}", name="ck_videos_status"),
+        # Listing: WHERE status = ? ORDER BY created_at / view_count
+        Index('ix_videos_status_created_at', 'status', 'created_at'),
+        Index('ix_videos_status_view_count', 'status', 'view_count'),
+        # Top rated / rating sort: WHERE status = ? ORDER BY avg_rating DESC
+        Index('ix_videos_status_avg_rating', 'status', 'avg_rating'),
+        # Search: ILIKE '%q%' on title / description (pg_trgm)
+        Index('ix_videos_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
+        Index(
+            'ix_videos_description_trgm', 'description',
+            postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'}
+        ),
+        # Videos by uploader (search uploader match, get_by_user)
+        Index('ix_videos_user_created_at', 'user_id', 'created_at'),
+    )
+
+    # Timestamps are stamped by the database; read them back with RETURNING
+    __mapper_args__ = {"eager_defaults": True}
 
     def __repr__(self):
         return f"<Video(id={self.id}, title={self.title}, status={self.status})>"
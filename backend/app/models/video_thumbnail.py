@@ -1,23 +1,34 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from datetime import datetime
+from typing import TYPE_CHECKING
+from sqlalchemy import Integer, String, Boolean, ForeignKey, DateTime, Index, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
 from app.core.database import Base
 
+if TYPE_CHECKING:
+    from app.models.video import Video
+
 
 class VideoThumbnail(Base):
     """Video thumbnail model"""
     __tablename__ = "video_thumbnails"
 
-    id = Column(Integer, primary_key=True, index=True)
-    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
-    file_path = Column(String, nullable=False)
-    is_auto_generated = Column(Boolean, default=True, nullable=False)
-    is_selected = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=func.now(), server_default=func.now(), nullable=False)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    video_id: Mapped[int] = mapped_column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False, index=True)
+    file_path: Mapped[str] = mapped_column(String, nullable=False)
+    is_auto_generated: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    is_selected: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=func.now(), server_default=func.now(), nullable=False)
 
     # Relationship
-    video = relationship("Video", back_populates="thumbnails")
+    video: Mapped["Video"] = relationship("Video", back_populates="thumbnails")
+
+    # Indexes
+    __table_args__ = (
+        # At most one selected thumbnail per video: keep the picker lookup tiny
+        Index('ix_video_thumbnails_selected', 'video_id', postgresql_where=text('is_selected')),
+    )
 
     def __repr__(self):
         return f"<VideoThumbnail(id={self.id}, video_id={self.video_id}, is_selected={self.is_selected})>"
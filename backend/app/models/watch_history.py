@@ -1,43 +1,58 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Boolean, UniqueConstraint
-from sqlalchemy.orm import relationship
-from app.core.database import Base
+from typing import TYPE_CHECKING
+from sqlalchemy import Integer, ForeignKey, DateTime, Boolean, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.core.database import Base, utc_now
+
+if TYPE_CHECKING:
+    from app.models.user import User
+    from app.models.video import Video
 
 
 class WatchHistory(Base):
     """Watch history model for tracking video playback progress"""
     __tablename__ = "watch_history"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
     # Foreign Keys
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    video_id: Mapped[int] = mapped_column(Integer, ForeignKey("videos.id", ondelete="CASCADE"), nullable=False)
 
     # Playback position (in seconds)
-    watch_position = Column(Integer, nullable=False, default=0)
+    watch_position: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     # Total watch duration (in seconds)
-    watch_duration = Column(Integer, nullable=False, default=0)
+    watch_duration: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
 
     # Completion status (true if watched >= 90%)
-    completed = Column(Boolean, default=False, nullable=False)
+    completed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
 
     # Timestamps
-    last_watched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    last_watched_at: Mapped[datetime] = mapped_column(DateTime, server_default=utc_now(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=utc_now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=utc_now(), onupdate=utc_now(), nullable=False)
 
     # Relationships
-    user = relationship("User", back_populates="watch_history")
-    video = relationship("Video", back_populates="watch_history")
+    user: Mapped["User"] = relationship("User", back_populates="watch_history")
+    video: Mapped["Video"] = relationship("Video", back_populates="watch_history")
 
     # Constraints
     __table_args__ = (
         # 한 사용자는 한 비디오에 하나의 시청 기록만 유지
         UniqueConstraint('user_id', 'video_id', name='uq_user_video_watch_history'),
+        # Continue watching / history: WHERE user_id = ? ORDER BY last_watched_at DESC
+        Index('ix_watch_history_user_last', 'user_id', 'last_watched_at'),
+        # Continue watching only reads started, unfinished entries
+        Index(
+            'ix_watch_history_continue', user_id, last_watched_at.desc(),
+            postgresql_where=(completed == False) & (watch_position > 0)
+        ),
     )
 
+    # Timestamps are stamped by the database; read them back with RETURNING
+    __mapper_args__ = {"eager_defaults": True}
+
     def __repr__(self):
         return f"<WatchHistory(id={self.id}, user_id={self.user_id}, video_id={self.video_id}, position={self.watch_position})>"
 
@@ -1,20 +1,34 @@
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator
 import re
 
+# Compiled once at import; validators run on every tag create/update/response
+_TAG_NAME_RE = re.compile(r'^[\w\s\-가-힣]+\Z')
+_TAG_NAME_ERROR = 'Tag name can only contain letters, numbers, spaces, hyphens, and Korean characters'
+# Length bounds run before the pattern, so oversized input never reaches the regex
+HEX_COLOR_PATTERN = "^#[0-9A-Fa-f]{6}$"
+HEX_COLOR_LENGTH = 7
+
 
 class TagBase(BaseModel):
     """Base schema for Tag"""
     name: str = Field(..., min_length=1, max_length=100, description="Tag name")
     description: Optional[str] = Field(None, max_length=500, description="Tag description")
-    color: str = Field("#3B82F6", pattern="^#[0-9A-Fa-f]{6}$", description="Hex color code")
-
-    @validator('name')
-    def validate_name(cls, v):
+    color: str = Field(
+        "#3B82F6",
+        min_length=HEX_COLOR_LENGTH,
+        max_length=HEX_COLOR_LENGTH,
+        pattern=HEX_COLOR_PATTERN,
+        description="Hex color code"
+    )
+
+    @field_validator('name')
+    @classmethod
+    def validate_name(cls, v: str) -> str:
         """Validate tag name - alphanumeric, spaces, hyphens only"""
-        if not re.match(r'^[\w\s\-가-힣]+$', v):
-            raise ValueError('Tag name can only contain letters, numbers, spaces, hyphens, and Korean characters')
+        if not _TAG_NAME_RE.match(v):
+            raise ValueError(_TAG_NAME_ERROR)
         return v.strip()
 
 
@@ -27,13 +41,14 @@ class TagUpdate(BaseModel):
     """Schema for updating a tag"""
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     description: Optional[str] = Field(None, max_length=500)
-    color: Optional[str] = Field(None, pattern="^#[0-9A-Fa-f]{6}$")
+    color: Optional[str] = Field(None, min_length=HEX_COLOR_LENGTH, max_length=HEX_COLOR_LENGTH, pattern=HEX_COLOR_PATTERN)
 
-    @validator('name')
-    def validate_name(cls, v):
+    @field_validator('name')
+    @classmethod
+    def validate_name(cls, v: Optional[str]) -> Optional[str]:
         if v is not None:
-            if not re.match(r'^[\w\s\-가-힣]+$', v):
-                raise ValueError('Tag name can only contain letters, numbers, spaces, hyphens, and Korean characters')
+            if not _TAG_NAME_RE.match(v):
+                raise ValueError(_TAG_NAME_ERROR)
             return v.strip()
         return v
 
@@ -54,6 +54,8 @@ class VideoListResponse(BaseModel):
     height: Optional[int] = None
     status: str
     view_count: int
+    avg_rating: float = 0.0
+    rating_count: int = 0
     created_at: datetime
     uploader_username: str
 
@@ -3,14 +3,76 @@ Email service for sending emails
 For development, emails are printed to console
 For production, configure SMTP settings in .env
 """
+import asyncio
+from pathlib import Path
 from typing import List
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
 from app.core.config import settings
 from app.core.security import create_email_verification_token
 
 
+class _SmtpPool:
+    """
+    Keeps SMTP connections open between emails, so each message doesn't pay
+    for a new TCP connect + TLS handshake + AUTH. At most `size` connections
+    are used concurrently.
+    """
+
+    def __init__(self, size: int):
+        self._idle: List[aiosmtplib.SMTP] = []
+        self._semaphore = asyncio.Semaphore(size)
+
+    @staticmethod
+    async def _connect() -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USER if settings.SMTP_USER else None,
+            password=settings.SMTP_PASSWORD if settings.SMTP_PASSWORD else None,
+            use_tls=settings.SMTP_PORT == 465,
+            start_tls=settings.SMTP_PORT == 587,
+        )
+        await client.connect()
+        return client
+
+    async def send_message(self, message: MIMEMultipart) -> None:
+        async with self._semaphore:
+            client = self._idle.pop() if self._idle else None
+            if client is None or not client.is_connected:
+                client = await self._connect()
+
+            try:
+                try:
+                    await client.send_message(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # Idle connection was closed by the server; retry once on a fresh one
+                    client = await self._connect()
+                    await client.send_message(message)
+            except Exception:
+                client.close()
+                raise
+
+            self._idle.append(client)
+
+
+_smtp_pool = _SmtpPool(settings.SMTP_POOL_SIZE)
+
+# Email templates are compiled once at import and rendered per message
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+_template_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+)
+_verification_html = _template_env.get_template("verification.html")
+_verification_text = _template_env.get_template("verification.txt")
+
+VERIFICATION_SUBJECT = "StreamFlix 이메일 인증"
+
+
 class EmailService:
     """Service for sending emails"""
 
@@ -49,16 +111,8 @@ class EmailService:
                 print("="*80 + "\n")
                 return True
 
-            # For production: send via SMTP
-            await aiosmtplib.send(
-                message,
-                hostname=settings.SMTP_HOST,
-                port=settings.SMTP_PORT,
-                username=settings.SMTP_USER if settings.SMTP_USER else None,
-                password=settings.SMTP_PASSWORD if settings.SMTP_PASSWORD else None,
-                use_tls=settings.SMTP_PORT == 587,
-                start_tls=settings.SMTP_PORT == 587,
-            )
+            # For production: send via SMTP (pooled connections)
+            await _smtp_pool.send_message(message)
             return True
 
         except Exception as e:
@@ -74,81 +128,18 @@ class EmailService:
         # Create verification link
         verification_link = f"{settings.FRONTEND_URL}/verify-email?token={token}"
 
-        # Create HTML content
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background-color: #4F46E5; color: white; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; background-color: #f9f9f9; }}
-                .button {{
-                    display: inline-block;
-                    padding: 12px 24px;
-                    background-color: #4F46E5;
-                    color: white !important;
-                    text-decoration: none;
-                    border-radius: 5px;
-                    margin: 20px 0;
-                }}
-                .footer {{ padding: 20px; text-align: center; color: #666; font-size: 12px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>StreamFlix</h1>
-                </div>
-                <div class="content">
-                    <h2>이메일 인증</h2>
-                    <p>안녕하세요, {username}님!</p>
-                    <p>StreamFlix에 가입해 주셔서 감사합니다. 아래 버튼을 클릭하여 이메일 주소를 인증해 주세요.</p>
-
-                    <div style="text-align: center;">
-                        <a href="{verification_link}" class="button">이메일 인증하기</a>
-                    </div>
-
-                    <p>버튼이 작동하지 않으면 아래 링크를 복사하여 브라우저에 붙여넣으세요:</p>
-                    <p style="word-break: break-all; color: #666; font-size: 12px;">{verification_link}</p>
-
-                    <p style="margin-top: 30px; color: #666; font-size: 12px;">
-                        이 링크는 {settings.EMAIL_VERIFICATION_EXPIRE_HOURS}시간 동안 유효합니다.
-                    </p>
-
-                    <p style="color: #666; font-size: 12px;">
-                        본인이 요청하지 않은 경우 이 이메일을 무시하셔도 됩니다.
-                    </p>
-                </div>
-                <div class="footer">
-                    <p>&copy; 2026 StreamFlix. All rights reserved.</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
-
-        # Text content (fallback)
-        text_content = f"""
-        StreamFlix 이메일 인증
-
-        안녕하세요, {username}님!
-
-        StreamFlix에 가입해 주셔서 감사합니다.
-        아래 링크를 클릭하여 이메일 주소를 인증해 주세요:
-
-        {verification_link}
-
-        이 링크는 {settings.EMAIL_VERIFICATION_EXPIRE_HOURS}시간 동안 유효합니다.
-        본인이 요청하지 않은 경우 이 이메일을 무시하셔도 됩니다.
-
-        © 2026 StreamFlix. All rights reserved.
-        """
+        # Render the precompiled templates
+        context = {
+            "username": username,
+            "verification_link": verification_link,
+            "expire_hours": settings.EMAIL_VERIFICATION_EXPIRE_HOURS,
+        }
+        html_content = _verification_html.render(context)
+        text_content = _verification_text.render(context)
 
         return await EmailService.send_email(
             to_email=email,
-            subject="StreamFlix 이메일 인증",
+            subject=VERIFICATION_SUBJECT,
             html_content=html_content,
             text_content=text_content
         )
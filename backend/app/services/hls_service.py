@@ -4,11 +4,22 @@ Converts videos to HLS format with multiple quality levels
 """
 import os
 import asyncio
+from collections import deque
 from pathlib import Path
-from typing import Optional, Literal
+from typing import Callable, Optional, Literal
 import logging
 from datetime import datetime
 
+from app.core.cache import TTLCache
+from app.core.ffmpeg import (
+    encode_command,
+    encode_cpu_count,
+    encoder_thread_args,
+    resolve_video_encoder,
+    video_encoder_args,
+)
+from app.services.video_service import VideoService
+
 logger = logging.getLogger(__name__)
 
 QualityType = Literal["480p", "720p", "1080p", "4k"]
@@ -25,6 +36,24 @@ _conversion_progress: dict[str, dict] = {}
 #   "error": str | None
 # }}
 
+# Per-video queues of WebSocket listeners waiting for progress updates
+_progress_subscribers: dict[str, set[asyncio.Queue]] = {}
+
+# Videos whose master playlist is known to exist (skips the stat per status poll)
+_hls_completed_cache: set[str] = set()
+
+# A conversion saturates every encode CPU; conversions started together
+# (e.g. several admin requests) queue here instead of oversubscribing them
+HLS_CONCURRENCY = max(1, encode_cpu_count() // 4)
+_hls_semaphore = asyncio.Semaphore(HLS_CONCURRENCY)
+
+# Segment files known to exist (skips the stat per .ts request), grouped per
+# video: {hls_dir: {"720p/segment3.ts", ...}}, so one video can be dropped alone
+_segment_exists_cache = TTLCache(maxsize=4096)
+
+# Available qualities per video; a short TTL bounds directory scans from status polling
+_available_qualities_cache = TTLCache(maxsize=4096, ttl=5)
+
 # Quality settings for HLS
 HLS_QUALITY_SETTINGS = {
     "480p": {
@@ -54,6 +83,18 @@ HLS_QUALITY_SETTINGS = {
 }
 
 
+# Master playlist entry per quality, rendered once at import
+_MASTER_PLAYLIST_HEADER = b"#EXTM3U\n#EXT-X-VERSION:3\n"
+_QUALITY_STREAM_INF = {
+    quality: (
+        f"#EXT-X-STREAM-INF:BANDWIDTH={int(preset['bitrate'].rstrip('k')) * 1000},"
+        f"RESOLUTION={preset['width']}x{preset['height']}\n"
+        f"{quality}/playlist.m3u8\n"
+    ).encode()
+    for quality, preset in HLS_QUALITY_SETTINGS.items()
+}
+
+
 def get_hls_directory(original_path: str) -> Path:
     """
     Get the HLS directory path for a video.
@@ -93,8 +134,35 @@ def is_hls_available(original_path: str) -> bool:
     Returns:
         True if master.m3u8 exists
     """
+    if original_path in _hls_completed_cache:
+        return True
+
     master_path = get_master_playlist_path(original_path)
-    return os.path.exists(master_path)
+    if os.path.exists(master_path):
+        _hls_completed_cache.add(original_path)
+        return True
+    return False
+
+
+def segment_exists(segment_path: Path) -> bool:
+    """
+    Check if an HLS segment file exists.
+    Positive results are cached; misses always fall through to the filesystem.
+    """
+    # segment_path is <hls_dir>/<quality>/<segment>
+    hls_dir = str(segment_path.parent.parent)
+    name = f"{segment_path.parent.name}/{segment_path.name}"
+    known = _segment_exists_cache.get(hls_dir)
+    if known is not None and name in known:
+        return True
+
+    if segment_path.exists():
+        if known is None:
+            known = set()
+            _segment_exists_cache.set(hls_dir, known)
+        known.add(name)
+        return True
+    return False
 
 
 def get_available_hls_qualities(original_path: str) -> list[str]:
@@ -104,6 +172,10 @@ def get_available_hls_qualities(original_path: str) -> list[str]:
     Returns:
         List of available qualities (e.g., ["480p", "720p", "1080p"])
     """
+    cached = _available_qualities_cache.get(original_path)
+    if cached is not None:
+        return list(cached)
+
     hls_dir = get_hls_directory(original_path)
     if not hls_dir.exists():
         return []
@@ -114,9 +186,35 @@ def get_available_hls_qualities(original_path: str) -> list[str]:
         if playlist.exists():
             qualities.append(quality)
 
+    _available_qualities_cache.set(original_path, tuple(qualities))
     return qualities
 
 
+async def _read_stderr_tail(stream: asyncio.StreamReader, max_chunks: int = 4) -> str:
+    """
+    Drain a subprocess stream to EOF, keeping only its last few chunks.
+
+    ffmpeg can write megabytes of diagnostics over a long encode; only the
+    tail is useful for error reporting, so memory stays bounded by
+    max_chunks * 4 KiB regardless of job length.
+    """
+    tail = deque(maxlen=max_chunks)
+    while chunk := await stream.read(4096):
+        tail.append(chunk)
+    return b"".join(tail).decode(errors="ignore")
+
+
+def _playlist_complete(playlist_path: Path) -> bool:
+    """True if a VOD playlist was fully written (ends with #EXT-X-ENDLIST)"""
+    try:
+        with open(playlist_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 64))
+            return f.read().rstrip().endswith(b"#EXT-X-ENDLIST")
+    except OSError:
+        return False
+
+
 async def convert_to_hls_quality(
     input_path: str,
     hls_dir: Path,
@@ -133,7 +231,7 @@ async def convert_to_hls_quality(
     Returns:
         True if successful
     """
-    settings = HLS_QUALITY_SETTINGS[quality]
+    preset = HLS_QUALITY_SETTINGS[quality]
     quality_dir = hls_dir / quality
     quality_dir.mkdir(parents=True, exist_ok=True)
 
@@ -145,43 +243,43 @@ async def convert_to_hls_quality(
     # -hls_playlist_type vod: Video on demand (not live)
     # -hls_segment_filename: segment file pattern
     # -hls_flags independent_segments: Each segment is independent
-    command = [
-        "ffmpeg",
+    encoder = await resolve_video_encoder()
+    command = encode_command([
         "-i", input_path,
-        "-vf", f"scale={settings['width']}:{settings['height']}",
-        "-c:v", "libx264",
-        "-preset", "medium",
-        "-crf", "23",
-        "-b:v", settings["bitrate"],
+        "-vf", f"scale={preset['width']}:{preset['height']}",
+        *video_encoder_args(encoder, preset["bitrate"]),
         "-c:a", "aac",
-        "-b:a", settings["audio_bitrate"],
+        "-b:a", preset["audio_bitrate"],
+        *encoder_thread_args(),
         "-hls_time", "6",
         "-hls_playlist_type", "vod",
         "-hls_segment_filename", str(segment_pattern),
         "-hls_flags", "independent_segments",
         str(playlist_path)
-    ]
+    ])
 
     try:
         logger.info(f"Starting HLS conversion: {quality}")
         print(f"[HLS] Starting conversion for {quality}")
 
-        process = await asyncio.create_subprocess_exec(
-            *command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+        async with _hls_semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
 
-        stdout, stderr = await process.communicate()
+            stderr_tail = await _read_stderr_tail(process.stderr)
+            await process.wait()
 
         if process.returncode == 0:
             print(f"[HLS] ✅ {quality} conversion completed")
             logger.info(f"HLS conversion completed: {quality}")
             return True
         else:
-            error_message = stderr.decode() if stderr else "No error message"
+            error_message = stderr_tail or "No error message"
             print(f"[HLS] ❌ {quality} conversion failed")
-            print(f"[HLS] Error: {error_message[:500]}")
+            print(f"[HLS] Error: {error_message[-500:]}")
             logger.error(f"HLS conversion failed for {quality}: {error_message}")
             return False
 
@@ -191,6 +289,132 @@ async def convert_to_hls_quality(
         return False
 
 
+async def _probe_duration(input_path: str) -> Optional[float]:
+    """Get source duration in seconds (None if it can't be determined)"""
+    # Shares the per-file metadata cache filled at upload time
+    metadata = await VideoService.extract_video_metadata(input_path)
+    return metadata.get("duration") or None
+
+
+async def convert_to_hls_qualities(
+    input_path: str,
+    hls_dir: Path,
+    qualities: list[QualityType],
+    on_progress: Optional[Callable[[int], None]] = None
+) -> list[QualityType]:
+    """
+    Convert video to HLS for several qualities in a single ffmpeg run.
+
+    The source is decoded once and split into one scaled stream per quality,
+    instead of decoding it again for every quality.
+
+    Args:
+        input_path: Path to source video
+        hls_dir: HLS output directory
+        qualities: Quality presets to generate
+        on_progress: Called with the encode percentage (0-99) as ffmpeg reports it
+
+    Returns:
+        Qualities whose playlist was written successfully. If the combined
+        encode fails, the qualities it didn't finish are retried one at a
+        time, so one failing output doesn't discard the others.
+    """
+    # [0:v]split=N[s0][s1]...;[s0]scale=854:480[v0];[s1]scale=1280:720[v1];...
+    filters = [f"[0:v]split={len(qualities)}" + "".join(f"[s{i}]" for i in range(len(qualities)))]
+    for i, quality in enumerate(qualities):
+        preset = HLS_QUALITY_SETTINGS[quality]
+        filters.append(f"[s{i}]scale={preset['width']}:{preset['height']}[v{i}]")
+
+    encoder = await resolve_video_encoder()
+    args = [
+        "-i", input_path,
+        "-filter_complex", ";".join(filters),
+        "-progress", "pipe:1",
+        "-nostats",
+    ]
+
+    for i, quality in enumerate(qualities):
+        preset = HLS_QUALITY_SETTINGS[quality]
+        quality_dir = hls_dir / quality
+        quality_dir.mkdir(parents=True, exist_ok=True)
+
+        args += [
+            "-map", f"[v{i}]",
+            "-map", "0:a?",
+            *video_encoder_args(encoder, preset["bitrate"]),
+            "-c:a", "aac",
+            "-b:a", preset["audio_bitrate"],
+            *encoder_thread_args(),
+            "-hls_time", "6",
+            "-hls_playlist_type", "vod",
+            "-hls_segment_filename", str(quality_dir / "segment%d.ts"),
+            "-hls_flags", "independent_segments",
+            str(quality_dir / "playlist.m3u8")
+        ]
+
+    try:
+        duration = await _probe_duration(input_path)
+
+        logger.info(f"Starting HLS conversion: {', '.join(qualities)}")
+        print(f"[HLS] Starting single-pass conversion for {', '.join(qualities)}")
+
+        async with _hls_semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *encode_command(args),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+
+            # Drain stderr concurrently so a chatty ffmpeg can't block on a full pipe
+            stderr_task = asyncio.create_task(_read_stderr_tail(process.stderr))
+
+            try:
+                # -progress emits key=value lines; out_time_us is the encoded position
+                async for line in process.stdout:
+                    key, _, value = line.decode(errors="ignore").strip().partition("=")
+                    if key == "out_time_us" and value.isdigit() and duration and on_progress:
+                        on_progress(min(99, int(int(value) / 1_000_000 / duration * 100)))
+
+                stderr_tail = await stderr_task
+                await process.wait()
+            finally:
+                # Don't leave ffmpeg running (outside the semaphore) on error or cancel
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                stderr_task.cancel()
+
+        completed = [
+            quality for quality in qualities
+            if _playlist_complete(hls_dir / quality / "playlist.m3u8")
+        ]
+
+        if process.returncode != 0:
+            error_message = stderr_tail or "No error message"
+            print(f"[HLS] ❌ Conversion failed")
+            print(f"[HLS] Error: {error_message[-500:]}")
+            logger.error(f"HLS conversion failed: {error_message}")
+
+            # Keep what finished; retry the rest separately
+            for quality in qualities:
+                if quality not in completed and await convert_to_hls_quality(
+                    input_path, hls_dir, quality
+                ):
+                    completed.append(quality)
+            completed.sort(key=qualities.index)
+
+        if not completed:
+            return []
+        print(f"[HLS] ✅ {', '.join(completed)} conversion completed")
+        logger.info(f"HLS conversion completed: {completed}")
+        return completed
+
+    except Exception as e:
+        logger.error(f"HLS conversion error: {str(e)}")
+        print(f"[HLS] ❌ Exception during conversion: {str(e)}")
+        return []
+
+
 def create_master_playlist(hls_dir: Path, qualities: list[QualityType]):
     """
     Create master playlist (master.m3u8) that references all quality levels.
@@ -201,18 +425,10 @@ def create_master_playlist(hls_dir: Path, qualities: list[QualityType]):
     """
     master_path = hls_dir / "master.m3u8"
 
-    lines = ["#EXTM3U", "#EXT-X-VERSION:3"]
-
-    for quality in qualities:
-        settings = HLS_QUALITY_SETTINGS[quality]
-        bandwidth = int(settings["bitrate"].replace("k", "000"))
-        resolution = f"{settings['width']}x{settings['height']}"
-
-        lines.append(f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={resolution}")
-        lines.append(f"{quality}/playlist.m3u8")
-
-    master_content = "\n".join(lines) + "\n"
-    master_path.write_text(master_content)
+    master_content = _MASTER_PLAYLIST_HEADER + b"".join(
+        _QUALITY_STREAM_INF[quality] for quality in qualities
+    )
+    master_path.write_bytes(master_content)
     logger.info(f"Created master playlist: {master_path}")
     print(f"[HLS] ✅ Master playlist created")
 
@@ -245,32 +461,33 @@ async def convert_video_to_hls(
     _conversion_progress[original_path] = {
         "status": "converting",
         "progress": 0,
-        "current_quality": qualities[0],
+        "current_quality": "/".join(qualities),
         "total_qualities": len(qualities),
         "completed_qualities": 0,
         "started_at": datetime.now(),
         "error": None
     }
+    _publish_progress(original_path)
 
-    # Convert each quality
-    successful_qualities = []
-    try:
-        for idx, quality in enumerate(qualities):
-            # Update current quality
-            _conversion_progress[original_path]["current_quality"] = quality
-            _conversion_progress[original_path]["progress"] = int((idx / len(qualities)) * 100)
+    def on_progress(percent: int):
+        if percent != _conversion_progress[original_path]["progress"]:
+            _conversion_progress[original_path]["progress"] = percent
+            _publish_progress(original_path)
 
-            success = await convert_to_hls_quality(original_path, hls_dir, quality)
-            if success:
-                successful_qualities.append(quality)
-                _conversion_progress[original_path]["completed_qualities"] = len(successful_qualities)
-                _conversion_progress[original_path]["progress"] = int(((idx + 1) / len(qualities)) * 100)
+    # Encode all qualities in one pass (single decode of the source)
+    try:
+        successful_qualities = await convert_to_hls_qualities(
+            original_path, hls_dir, qualities, on_progress
+        )
+        _available_qualities_cache.invalidate(original_path)
+        _conversion_progress[original_path]["completed_qualities"] = len(successful_qualities)
 
         if not successful_qualities:
             logger.error("No qualities were successfully converted")
             print("[HLS] ❌ No qualities were successfully converted")
             _conversion_progress[original_path]["status"] = "failed"
             _conversion_progress[original_path]["error"] = "No qualities were successfully converted"
+            _publish_progress(original_path)
             return False
 
         # Create master playlist
@@ -280,8 +497,10 @@ async def convert_video_to_hls(
         logger.info(f"HLS conversion complete: {successful_qualities}")
 
         # Mark as completed
+        _hls_completed_cache.add(original_path)
         _conversion_progress[original_path]["status"] = "completed"
         _conversion_progress[original_path]["progress"] = 100
+        _publish_progress(original_path)
 
         return True
 
@@ -289,6 +508,7 @@ async def convert_video_to_hls(
         logger.error(f"HLS conversion failed: {e}")
         _conversion_progress[original_path]["status"] = "failed"
         _conversion_progress[original_path]["error"] = str(e)
+        _publish_progress(original_path)
         return False
 
 
@@ -305,6 +525,52 @@ def get_conversion_progress(original_path: str) -> Optional[dict]:
     return _conversion_progress.get(original_path)
 
 
+def subscribe_progress(original_path: str) -> asyncio.Queue:
+    """
+    Register a listener for conversion progress updates of a video.
+
+    Args:
+        original_path: Path to original video
+
+    Returns:
+        Queue receiving a snapshot of the progress dict on every update
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=16)
+    _progress_subscribers.setdefault(original_path, set()).add(queue)
+    return queue
+
+
+def unsubscribe_progress(original_path: str, queue: asyncio.Queue):
+    """
+    Remove a listener registered with subscribe_progress.
+
+    Args:
+        original_path: Path to original video
+        queue: Queue returned by subscribe_progress
+    """
+    subscribers = _progress_subscribers.get(original_path)
+    if subscribers is None:
+        return
+    subscribers.discard(queue)
+    if not subscribers:
+        del _progress_subscribers[original_path]
+
+
+def _publish_progress(original_path: str):
+    """Push the current progress snapshot to all listeners of a video"""
+    subscribers = _progress_subscribers.get(original_path)
+    progress = _conversion_progress.get(original_path)
+    if not subscribers or progress is None:
+        return
+
+    snapshot = dict(progress)
+    for queue in subscribers:
+        if queue.full():
+            # Slow listener: drop the stale update, only the latest state matters
+            queue.get_nowait()
+        queue.put_nowait(snapshot)
+
+
 def clear_conversion_progress(original_path: str):
     """
     Clear conversion progress tracking for a video.
@@ -316,6 +582,18 @@ def clear_conversion_progress(original_path: str):
         del _conversion_progress[original_path]
 
 
+def invalidate_hls_caches(original_path: str):
+    """
+    Forget cached HLS state for a video whose HLS files are being removed.
+
+    Args:
+        original_path: Path to original video
+    """
+    _hls_completed_cache.discard(original_path)
+    _segment_exists_cache.invalidate(str(get_hls_directory(original_path)))
+    _available_qualities_cache.invalidate(original_path)
+
+
 def delete_hls_files(original_path: str):
     """
     Delete all HLS files for a video.
@@ -325,6 +603,8 @@ def delete_hls_files(original_path: str):
     """
     hls_dir = get_hls_directory(original_path)
 
+    invalidate_hls_caches(original_path)
+
     if hls_dir.exists():
         try:
             import shutil
@@ -0,0 +1,198 @@
+"""
+In-process MP4/MOV metadata reader
+Reads duration, resolution, frame rate and codec straight from the moov box,
+so uploads don't need an ffprobe subprocess for the common container
+"""
+import os
+import struct
+from typing import Iterator, Optional
+
+# Box types that may open an ISO-BMFF / QuickTime file
+_LEADING_BOX_TYPES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot"}
+
+# moov is normally a few hundred KB; anything larger is not worth reading here
+_MAX_MOOV_SIZE = 64 * 1024 * 1024
+
+# Sample entry fourcc -> ffprobe codec_name
+_CODEC_NAMES = {
+    b"avc1": "h264",
+    b"avc3": "h264",
+    b"hvc1": "hevc",
+    b"hev1": "hevc",
+    b"av01": "av1",
+    b"vp09": "vp9",
+    b"vp08": "vp8",
+    b"mp4v": "mpeg4",
+    b"mjpa": "mjpeg",
+    b"mjpb": "mjpeg",
+    b"jpeg": "mjpeg",
+    b"apch": "prores",
+    b"apcn": "prores",
+    b"apcs": "prores",
+    b"apco": "prores",
+    b"ap4h": "prores",
+}
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[tuple[bytes, int, int]]:
+    """Yield (type, payload_start, box_end) for each box in data[start:end]"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            raise ValueError(f"Malformed {box_type!r} box")
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def _find(data: bytes, start: int, end: int, box_type: bytes) -> Optional[tuple[int, int]]:
+    """Return (payload_start, box_end) of the first child box of box_type"""
+    for child_type, payload, box_end in _iter_boxes(data, start, end):
+        if child_type == box_type:
+            return payload, box_end
+    return None
+
+
+def _read_timescale_duration(data: bytes, payload: int) -> tuple[int, int]:
+    """Parse timescale and duration from an mvhd or mdhd payload"""
+    version = data[payload]
+    if version == 1:
+        return struct.unpack_from(">IQ", data, payload + 20)
+    return struct.unpack_from(">II", data, payload + 12)
+
+
+def _read_moov(path: str) -> bytes:
+    """Walk the top-level boxes and return the moov box contents"""
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        offset = 0
+        first = True
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            header = f.read(16)
+            size, box_type = struct.unpack_from(">I4s", header)
+            header_size = 8
+            if size == 1:
+                size = struct.unpack_from(">Q", header, 8)[0]
+                header_size = 16
+            elif size == 0:
+                size = file_size - offset
+
+            if first and box_type not in _LEADING_BOX_TYPES:
+                raise ValueError("Not an MP4/MOV file")
+            first = False
+            if size < header_size:
+                raise ValueError(f"Malformed {box_type!r} box")
+
+            if box_type == b"moov":
+                if size > _MAX_MOOV_SIZE:
+                    raise ValueError("moov box too large")
+                f.seek(offset + header_size)
+                moov = f.read(size - header_size)
+                if len(moov) != size - header_size:
+                    raise ValueError("Truncated moov box")
+                return moov
+
+            offset += size
+
+    raise ValueError("No moov box")
+
+
+def _parse_video_track(moov: bytes, trak: int, trak_end: int) -> Optional[dict]:
+    """Return video stream info for a trak box, or None if it isn't video"""
+    mdia = _find(moov, trak, trak_end, b"mdia")
+    if not mdia:
+        return None
+
+    hdlr = _find(moov, *mdia, b"hdlr")
+    if not hdlr or moov[hdlr[0] + 8:hdlr[0] + 12] != b"vide":
+        return None
+
+    mdhd = _find(moov, *mdia, b"mdhd")
+    minf = _find(moov, *mdia, b"minf")
+    stbl = minf and _find(moov, *minf, b"stbl")
+    stsd = stbl and _find(moov, *stbl, b"stsd")
+    if not (mdhd and stsd):
+        return None
+
+    # stsd: version/flags, entry_count, then the first VisualSampleEntry:
+    # size, fourcc, 6 reserved, data_reference_index, 16 pre-defined, width, height
+    entry = stsd[0] + 8
+    codec_tag = moov[entry + 4:entry + 8]
+    width, height = struct.unpack_from(">HH", moov, entry + 32)
+
+    # Frame rate from the dominant sample delta in stts (what ffprobe reports
+    # as r_frame_rate for constant frame rate video)
+    timescale, _ = _read_timescale_duration(moov, mdhd[0])
+    fps = 0.0
+    stts = _find(moov, *stbl, b"stts")
+    if stts and timescale:
+        entry_count = struct.unpack_from(">I", moov, stts[0] + 4)[0]
+        entries = [
+            struct.unpack_from(">II", moov, stts[0] + 8 + i * 8)
+            for i in range(min(entry_count, (stts[1] - stts[0] - 8) // 8))
+        ]
+        if entries:
+            _, delta = max(entries, key=lambda e: e[0])
+            if delta:
+                fps = timescale / delta
+
+    codec = _CODEC_NAMES.get(codec_tag)
+    if codec is None:
+        raise ValueError(f"Unknown video codec {codec_tag!r}")
+
+    return {"width": width, "height": height, "fps": fps, "codec": codec}
+
+
+def probe(path: str) -> dict:
+    """
+    Read video metadata from an MP4/MOV file without spawning ffprobe.
+
+    Args:
+        path: Path to video file
+
+    Returns:
+        {duration, width, height, fps, codec, bitrate}, the same keys and
+        units as VideoService.extract_video_metadata
+
+    Raises:
+        ValueError: if the file isn't MP4/MOV, has no video track, has no
+            duration in moov (e.g. fragmented MP4) or can't be parsed
+    """
+    try:
+        moov = _read_moov(path)
+
+        mvhd = _find(moov, 0, len(moov), b"mvhd")
+        if not mvhd:
+            raise ValueError("No mvhd box")
+        timescale, duration = _read_timescale_duration(moov, mvhd[0])
+        if not timescale or not duration:
+            raise ValueError("No duration in mvhd")
+        seconds = duration / timescale
+
+        for box_type, trak, trak_end in _iter_boxes(moov):
+            if box_type != b"trak":
+                continue
+            stream = _parse_video_track(moov, trak, trak_end)
+            if stream:
+                break
+        else:
+            raise ValueError("No video track")
+    except struct.error as e:
+        raise ValueError(f"Truncated box: {e}") from e
+
+    return {
+        "duration": int(seconds),
+        "width": stream["width"],
+        "height": stream["height"],
+        "fps": stream["fps"],
+        "codec": stream["codec"],
+        "bitrate": int(os.path.getsize(path) * 8 / seconds) // 1000,  # kbps
+    }
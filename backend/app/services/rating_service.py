@@ -1,7 +1,7 @@
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, func, and_, update, delete, null
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.models.rating import Rating
 from app.models.video import Video
@@ -11,6 +11,35 @@ from app.schemas.rating import RatingCreate, VideoRatingStats
 class RatingService:
     """Service for rating CRUD operations"""
 
+    @staticmethod
+    async def _lock_video(db: AsyncSession, video_id: int) -> None:
+        """
+        Lock the video row so concurrent rating writes for the same video
+        recompute its aggregates one after another
+        """
+        await db.execute(
+            select(Video.id).where(Video.id == video_id).with_for_update()
+        )
+
+    @staticmethod
+    async def _refresh_video_rating_stats(db: AsyncSession, video_id: int) -> None:
+        """Recompute Video.avg_rating / rating_count in the current transaction"""
+        await db.execute(
+            update(Video)
+            .where(Video.id == video_id)
+            .values(
+                avg_rating=select(func.coalesce(func.avg(Rating.score), 0.0))
+                .where(Rating.video_id == video_id)
+                .scalar_subquery(),
+                rating_count=select(func.count(Rating.id))
+                .where(Rating.video_id == video_id)
+                .scalar_subquery(),
+                # A new rating is not an edit of the video: keep updated_at as is
+                updated_at=Video.updated_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+
     @staticmethod
     async def create_or_update_rating(
         db: AsyncSession,
@@ -21,56 +50,34 @@ class RatingService:
         """
         Create or update a user's rating for a video
 
-        Uses upsert logic: if rating exists, update it; otherwise create new one
+        Issues a single INSERT ... ON CONFLICT (user_id, video_id) DO UPDATE,
+        so concurrent first ratings by the same user cannot collide.
         """
-        # Check if rating already exists
+        await RatingService._lock_video(db, video_id)
+
+        stmt = pg_insert(Rating).values(
+            user_id=user_id,
+            video_id=video_id,
+            score=rating_data.score
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Rating.user_id, Rating.video_id],
+            set_={
+                "score": stmt.excluded.score,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+
         result = await db.execute(
-            select(Rating).where(
-                and_(
-                    Rating.user_id == user_id,
-                    Rating.video_id == video_id
-                )
-            )
+            select(Rating)
+            .from_statement(stmt.returning(Rating))
+            .execution_options(populate_existing=True)
         )
-        existing_rating = result.scalar_one_or_none()
+        rating = result.scalar_one()
 
-        if existing_rating:
-            # Update existing rating
-            existing_rating.score = rating_data.score
-            await db.commit()
-            await db.refresh(existing_rating)
-            return existing_rating
-        else:
-            # Create new rating
-            new_rating = Rating(
-                user_id=user_id,
-                video_id=video_id,
-                score=rating_data.score
-            )
-            db.add(new_rating)
-
-            try:
-                await db.commit()
-                await db.refresh(new_rating)
-                return new_rating
-            except IntegrityError:
-                await db.rollback()
-                # Handle race condition: if rating was created concurrently, try to update
-                result = await db.execute(
-                    select(Rating).where(
-                        and_(
-                            Rating.user_id == user_id,
-                            Rating.video_id == video_id
-                        )
-                    )
-                )
-                existing_rating = result.scalar_one_or_none()
-                if existing_rating:
-                    existing_rating.score = rating_data.score
-                    await db.commit()
-                    await db.refresh(existing_rating)
-                    return existing_rating
-                raise
+        await RatingService._refresh_video_rating_stats(db, video_id)
+        await db.commit()
+        return rating
 
     @staticmethod
     async def get_user_rating(
@@ -103,25 +110,26 @@ class RatingService:
             - rating_count: Total number of ratings
             - user_rating: Current user's rating (if user_id provided)
         """
-        # Get average rating and count
+        # The user's score rides along as a scalar subquery: one round trip
+        if user_id:
+            user_score = (
+                select(Rating.score)
+                .where(and_(Rating.user_id == user_id, Rating.video_id == video_id))
+                .scalar_subquery()
+            )
+        else:
+            user_score = null()
+
+        # Read the denormalized aggregates (0.0 / 0 for unknown videos)
         result = await db.execute(
-            select(
-                func.coalesce(func.avg(Rating.score), 0.0).label('avg_rating'),
-                func.count(Rating.id).label('rating_count')
-            ).where(Rating.video_id == video_id)
+            select(Video.avg_rating, Video.rating_count, user_score).where(Video.id == video_id)
         )
-        stats = result.one()
-
-        # Get user's rating if user_id provided
-        user_rating = None
-        if user_id:
-            user_rating_obj = await RatingService.get_user_rating(db, user_id, video_id)
-            if user_rating_obj:
-                user_rating = user_rating_obj.score
+        stats = result.one_or_none()
+        avg_rating, rating_count, user_rating = stats if stats else (0.0, 0, None)
 
         return VideoRatingStats(
-            avg_rating=float(stats.avg_rating),
-            rating_count=stats.rating_count,
+            avg_rating=float(avg_rating),
+            rating_count=rating_count,
             user_rating=user_rating
         )
 
@@ -137,20 +145,25 @@ class RatingService:
         Returns:
             True if rating was deleted, False if rating didn't exist
         """
+        await RatingService._lock_video(db, video_id)
+
+        # Single DELETE ... RETURNING instead of loading the row first
         result = await db.execute(
-            select(Rating).where(
+            delete(Rating)
+            .where(
                 and_(
                     Rating.user_id == user_id,
                     Rating.video_id == video_id
                 )
             )
+            .returning(Rating.id)
         )
-        rating = result.scalar_one_or_none()
 
-        if rating:
-            await db.delete(rating)
+        if result.scalar_one_or_none() is not None:
+            await RatingService._refresh_video_rating_stats(db, video_id)
             await db.commit()
             return True
+        await db.rollback()
         return False
 
 
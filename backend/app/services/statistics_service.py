@@ -1,16 +1,23 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, func, desc, true
+from sqlalchemy.engine import RowMapping
 from typing import List
+from app.core.cache import TTLCache
+from app.models.user import User
 from app.models.video import Video
 from app.models.rating import Rating
+from app.services.video_service import LIST_COLUMNS
+
+# Platform-wide totals move slowly; serve them from memory for a minute
+SUMMARY_CACHE_TTL = 60
+_summary_cache = TTLCache(maxsize=1, ttl=SUMMARY_CACHE_TTL)
 
 
 async def get_popular_videos(
     db: AsyncSession,
     limit: int = 10,
     skip: int = 0
-) -> List[Video]:
+) -> List[RowMapping]:
     """
     Get most popular videos by view count.
 
@@ -20,11 +27,11 @@ async def get_popular_videos(
         skip: Number of videos to skip for pagination (default: 0)
 
     Returns:
-        List of Video objects ordered by view count (descending)
+        List of VideoListResponse rows ordered by view count (descending)
     """
     query = (
-        select(Video)
-        .options(joinedload(Video.uploader))
+        select(*LIST_COLUMNS)
+        .join(User, Video.user_id == User.id)
         .where(Video.status == "ready")
         .order_by(desc(Video.view_count))
         .offset(skip)
@@ -32,8 +39,7 @@ async def get_popular_videos(
     )
 
     result = await db.execute(query)
-    videos = result.scalars().unique().all()
-    return list(videos)
+    return list(result.mappings().all())
 
 
 async def get_top_rated_videos(
@@ -52,49 +58,27 @@ async def get_top_rated_videos(
         min_ratings: Minimum number of ratings required (default: 5)
 
     Returns:
-        List of dicts containing video info and rating statistics
+        List of dicts containing the video row and rating statistics
     """
-    # Subquery to calculate average rating and rating count per video
-    rating_stats = (
-        select(
-            Rating.video_id,
-            func.avg(Rating.score).label('avg_rating'),
-            func.count(Rating.id).label('rating_count')
-        )
-        .group_by(Rating.video_id)
-        .having(func.count(Rating.id) >= min_ratings)
-        .subquery()
-    )
-
-    # Main query to get videos with their rating stats
+    # Rating aggregates are denormalized onto videos, so no GROUP BY over ratings
     query = (
-        select(
-            Video,
-            rating_stats.c.avg_rating,
-            rating_stats.c.rating_count
-        )
-        .join(rating_stats, Video.id == rating_stats.c.video_id)
-        .options(joinedload(Video.uploader))
-        .where(Video.status == "ready")
-        .order_by(desc(rating_stats.c.avg_rating))
+        select(*LIST_COLUMNS)
+        .join(User, Video.user_id == User.id)
+        .where(Video.status == "ready", Video.rating_count >= min_ratings)
+        .order_by(desc(Video.avg_rating))
         .offset(skip)
         .limit(limit)
     )
 
     result = await db.execute(query)
-    rows = result.all()
 
     # Format the results
     top_rated = []
-    for row in rows:
-        video = row[0]
-        avg_rating = float(row[1])
-        rating_count = int(row[2])
-
+    for video in result.mappings():
         top_rated.append({
             "video": video,
-            "avg_rating": round(avg_rating, 2),
-            "rating_count": rating_count
+            "avg_rating": round(video["avg_rating"], 2),
+            "rating_count": video["rating_count"]
         })
 
     return top_rated
@@ -106,35 +90,39 @@ async def get_video_statistics_summary(
     """
     Get overall video statistics summary.
 
+    Cached in process for SUMMARY_CACHE_TTL seconds.
+
     Args:
         db: Database session
 
     Returns:
         Dictionary containing platform statistics
     """
-    # Total videos
-    total_videos_query = select(func.count(Video.id)).where(Video.status == "ready")
-    total_videos_result = await db.execute(total_videos_query)
-    total_videos = total_videos_result.scalar()
-
-    # Total views
-    total_views_query = select(func.sum(Video.view_count))
-    total_views_result = await db.execute(total_views_query)
-    total_views = total_views_result.scalar() or 0
-
-    # Total ratings
-    total_ratings_query = select(func.count(Rating.id))
-    total_ratings_result = await db.execute(total_ratings_query)
-    total_ratings = total_ratings_result.scalar()
-
-    # Average rating across platform
-    avg_rating_query = select(func.avg(Rating.score))
-    avg_rating_result = await db.execute(avg_rating_query)
-    avg_rating = avg_rating_result.scalar()
-
-    return {
+    cached = _summary_cache.get("summary")
+    if cached is not None:
+        return dict(cached)
+
+    # One scan of videos and one of ratings, joined as two single-row subqueries
+    video_totals = select(
+        func.count(Video.id).filter(Video.status == "ready").label("total_videos"),
+        func.coalesce(func.sum(Video.view_count), 0).label("total_views")
+    ).subquery()
+    rating_totals = select(
+        func.count(Rating.id).label("total_ratings"),
+        func.avg(Rating.score).label("avg_rating")
+    ).subquery()
+
+    result = await db.execute(
+        select(video_totals, rating_totals)
+        .select_from(video_totals.join(rating_totals, true()))
+    )
+    total_videos, total_views, total_ratings, avg_rating = result.one()
+
+    summary = {
         "total_videos": total_videos,
         "total_views": total_views,
         "total_ratings": total_ratings,
         "average_rating": round(float(avg_rating), 2) if avg_rating else 0.0
     }
+    _summary_cache.set("summary", summary)
+    return dict(summary)
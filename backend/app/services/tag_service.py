@@ -1,7 +1,8 @@
+from datetime import datetime
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, func, delete, literal, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import re
 
 from app.models.tag import Tag
@@ -9,6 +10,10 @@ from app.models.video import Video
 from app.models.associations import video_tags
 from app.schemas.tag import TagCreate, TagUpdate
 
+# Compiled once at import; generate_slug runs on every tag create/update
+_SLUG_STRIP_RE = re.compile(r'[^\w\s-]')
+_SLUG_COLLAPSE_RE = re.compile(r'[-\s]+')
+
 
 class TagService:
     """Service for tag management"""
@@ -19,8 +24,8 @@ class TagService:
         # Convert to lowercase
         slug = name.lower()
         # Replace spaces and special chars with hyphens
-        slug = re.sub(r'[^\w\s-]', '', slug)
-        slug = re.sub(r'[-\s]+', '-', slug)
+        slug = _SLUG_STRIP_RE.sub('', slug)
+        slug = _SLUG_COLLAPSE_RE.sub('-', slug)
         # Remove leading/trailing hyphens
         slug = slug.strip('-')
         return slug
@@ -59,26 +64,56 @@ class TagService:
     async def get_by_id(self, db: AsyncSession, tag_id: int) -> Optional[Tag]:
         """Get tag by ID"""
         result = await db.execute(
-            select(Tag).options(selectinload(Tag.videos)).where(Tag.id == tag_id)
+            select(Tag).where(Tag.id == tag_id)
         )
         return result.scalar_one_or_none()
 
     async def get_by_slug(self, db: AsyncSession, slug: str) -> Optional[Tag]:
         """Get tag by slug"""
         result = await db.execute(
-            select(Tag).options(selectinload(Tag.videos)).where(Tag.slug == slug)
+            select(Tag).where(Tag.slug == slug)
         )
         return result.scalar_one_or_none()
 
+    async def get_with_video_count(
+        self,
+        db: AsyncSession,
+        tag_id: Optional[int] = None,
+        slug: Optional[str] = None
+    ) -> Optional[tuple[Tag, int]]:
+        """
+        Get a tag by ID or slug together with its video count.
+
+        For read-only lookups: the count is computed in SQL, so the tag's
+        videos are never loaded.
+        """
+        query = (
+            select(Tag, func.count(video_tags.c.video_id).label('video_count'))
+            .outerjoin(video_tags, Tag.id == video_tags.c.tag_id)
+            .group_by(Tag.id)
+        )
+        if tag_id is not None:
+            query = query.where(Tag.id == tag_id)
+        else:
+            query = query.where(Tag.slug == slug)
+
+        row = (await db.execute(query)).first()
+        return (row[0], row[1]) if row else None
+
     async def get_all(
         self,
         db: AsyncSession,
         skip: int = 0,
         limit: int = 100,
         search: Optional[str] = None
-    ) -> List[Tag]:
-        """Get all tags with optional search"""
-        query = select(Tag).options(selectinload(Tag.videos))
+    ) -> List[tuple[Tag, int]]:
+        """Get all tags with optional search, paired with their video counts"""
+        # Count in SQL instead of loading every tagged video just to len() it
+        query = (
+            select(Tag, func.count(video_tags.c.video_id).label('video_count'))
+            .outerjoin(video_tags, Tag.id == video_tags.c.tag_id)
+            .group_by(Tag.id)
+        )
 
         if search:
             search_pattern = f"%{search}%"
@@ -92,7 +127,7 @@ class TagService:
         query = query.order_by(Tag.name).offset(skip).limit(limit)
 
         result = await db.execute(query)
-        return list(result.scalars().all())
+        return [(row[0], row[1]) for row in result.all()]
 
     async def get_popular(
         self,
@@ -138,32 +173,49 @@ class TagService:
         await db.delete(tag)
         await db.commit()
 
+    async def get_video_tags(self, db: AsyncSession, video_id: int) -> List[Tag]:
+        """Get the tags attached to a video, in the order they were added"""
+        result = await db.execute(
+            select(Tag)
+            .join(video_tags, Tag.id == video_tags.c.tag_id)
+            .where(video_tags.c.video_id == video_id)
+            .order_by(video_tags.c.created_at, Tag.id)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    def _link_tags_stmt(video_id: int, tag_ids: List[int]):
+        """
+        INSERT ... SELECT linking existing tags to a video.
+
+        Selecting from tags drops unknown IDs; ON CONFLICT DO NOTHING skips
+        tags the video already has.
+        """
+        return (
+            pg_insert(video_tags)
+            .from_select(
+                ['video_id', 'tag_id'],
+                select(literal(video_id), Tag.id).where(Tag.id.in_(tag_ids))
+            )
+            .on_conflict_do_nothing(index_elements=['video_id', 'tag_id'])
+        )
+
     async def add_tags_to_video(
         self,
         db: AsyncSession,
         video: Video,
         tag_ids: List[int]
     ) -> List[Tag]:
-        """Add tags to a video"""
-        # Get existing tags for this video
-        existing_tag_ids = {tag.id for tag in video.tags}
-
-        # Get tags to add (only new ones)
-        new_tag_ids = set(tag_ids) - existing_tag_ids
+        """
+        Add tags to a video
 
-        if new_tag_ids:
-            # Get tag objects
-            result = await db.execute(
-                select(Tag).where(Tag.id.in_(new_tag_ids))
-            )
-            tags_to_add = result.scalars().all()
-
-            # Add tags to video
-            video.tags.extend(tags_to_add)
+        Writes the association rows directly; video.tags is never loaded.
+        """
+        if tag_ids:
+            await db.execute(self._link_tags_stmt(video.id, tag_ids))
             await db.commit()
-            await db.refresh(video, ['tags'])
 
-        return video.tags
+        return await self.get_video_tags(db, video.id)
 
     async def remove_tags_from_video(
         self,
@@ -172,12 +224,15 @@ class TagService:
         tag_ids: List[int]
     ) -> List[Tag]:
         """Remove tags from a video"""
-        # Remove specified tags
-        video.tags = [tag for tag in video.tags if tag.id not in tag_ids]
+        await db.execute(
+            delete(video_tags).where(
+                video_tags.c.video_id == video.id,
+                video_tags.c.tag_id.in_(tag_ids)
+            )
+        )
         await db.commit()
-        await db.refresh(video, ['tags'])
 
-        return video.tags
+        return await self.get_video_tags(db, video.id)
 
     async def set_video_tags(
         self,
@@ -186,38 +241,49 @@ class TagService:
         tag_ids: List[int]
     ) -> List[Tag]:
         """Set video tags (replace all existing tags)"""
-        # Get tags
-        result = await db.execute(
-            select(Tag).where(Tag.id.in_(tag_ids))
+        # Drop tags not in the new set, then link the rest, in one transaction
+        await db.execute(
+            delete(video_tags).where(
+                video_tags.c.video_id == video.id,
+                video_tags.c.tag_id.not_in(tag_ids)
+            )
         )
-        tags = list(result.scalars().all())
-
-        # Replace all tags
-        video.tags = tags
+        if tag_ids:
+            await db.execute(self._link_tags_stmt(video.id, tag_ids))
         await db.commit()
-        await db.refresh(video, ['tags'])
 
-        return video.tags
+        return await self.get_video_tags(db, video.id)
 
     async def get_videos_by_tag(
         self,
         db: AsyncSession,
         tag_id: int,
-        skip: int = 0,
+        after: Optional[tuple[datetime, int]] = None,
         limit: int = 20
-    ) -> List[Video]:
-        """Get all videos with a specific tag"""
+    ) -> tuple[List[Video], Optional[tuple[datetime, int]]]:
+        """
+        Get videos with a specific tag, newest first
+
+        Keyset paginated on (created_at, id): pass the returned cursor as
+        `after` to fetch the next page. The cursor is None on the last page.
+        """
         query = (
             select(Video)
             .join(video_tags, Video.id == video_tags.c.video_id)
             .where(video_tags.c.tag_id == tag_id)
-            .order_by(Video.created_at.desc())
-            .offset(skip)
-            .limit(limit)
         )
+        if after is not None:
+            query = query.where(tuple_(Video.created_at, Video.id) < after)
+
+        query = query.order_by(Video.created_at.desc(), Video.id.desc()).limit(limit)
 
         result = await db.execute(query)
-        return list(result.scalars().all())
+        videos = list(result.scalars().all())
+
+        next_cursor = None
+        if len(videos) == limit:
+            next_cursor = (videos[-1].created_at, videos[-1].id)
+        return videos, next_cursor
 
     async def search_tags(
         self,
@@ -1,19 +1,63 @@
 import os
-import subprocess
+import asyncio
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.video import Video
 from app.models.video_thumbnail import VideoThumbnail
 from app.core.config import settings
+from app.core.ffmpeg import (
+    encode_command,
+    encode_cpu_count,
+    hwaccel_args,
+    preview_encoder_args,
+    resolve_video_encoder,
+)
+
+
+# Preview clip encodes running at once (uploads in a burst, bulk scripts)
+_preview_semaphore = asyncio.Semaphore(min(encode_cpu_count(), 4))
+
+
+async def _run(*cmd: str, timeout: float) -> Tuple[int, bytes, bytes]:
+    """Run a command without blocking the event loop; kill it on timeout"""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+    return process.returncode, stdout, stderr
+
+
+def _list_thumbnails(thumbnails_dir: Path) -> List[str]:
+    """Sorted thumb_*.webp paths in a directory, from a single scandir pass"""
+    with os.scandir(thumbnails_dir) as entries:
+        return sorted(
+            entry.path for entry in entries
+            if entry.name.startswith("thumb_") and entry.name.endswith(".webp")
+        )
 
 
 class ThumbnailService:
     """Service for thumbnail generation and management"""
 
     @staticmethod
-    def generate_thumbnails(video_path: str, video_id: int, max_thumbnails: int = 12) -> List[str]:
+    async def generate_thumbnails(
+        video_path: str,
+        video_id: int,
+        max_thumbnails: int = 12,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        duration: Optional[float] = None
+    ) -> List[str]:
         """
         Generate thumbnails from video using FFmpeg scene detection or interval-based method
 
@@ -21,6 +65,9 @@ class ThumbnailService:
             video_path: Path to video file
             video_id: Video ID for creating thumbnail directory
             max_thumbnails: Maximum number of thumbnails to generate
+            width: Known video width (skips the ffprobe call with height)
+            height: Known video height
+            duration: Known duration in seconds, passed to the interval fallback
 
         Returns:
             List of generated thumbnail file paths
@@ -32,24 +79,25 @@ class ThumbnailService:
         try:
             # Get video resolution to determine if we should use scene detection
             # Scene detection is very slow for high-resolution videos (4K, etc.)
-            probe_cmd = [
-                settings.FFPROBE_PATH,
-                '-v', 'error',
-                '-select_streams', 'v:0',
-                '-show_entries', 'stream=width,height',
-                '-of', 'csv=p=0',
-                video_path
-            ]
+            if not (width and height):
+                probe_cmd = [
+                    settings.FFPROBE_PATH,
+                    '-v', 'error',
+                    '-select_streams', 'v:0',
+                    '-show_entries', 'stream=width,height',
+                    '-of', 'csv=p=0',
+                    video_path
+                ]
 
-            probe_result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
-            width, height = map(int, probe_result.stdout.strip().split(','))
+                _, stdout, _ = await _run(*probe_cmd, timeout=10)
+                width, height = map(int, stdout.decode().strip().split(','))
 
             # For high-resolution videos (> 1080p), use interval-based method
             # Scene detection is too slow for 4K+ videos
             if width > 1920 or height > 1080:
                 print(f"High resolution video ({width}x{height}), using interval-based thumbnails")
-                return ThumbnailService._generate_interval_thumbnails(
-                    video_path, video_id, max_thumbnails
+                return await ThumbnailService._generate_interval_thumbnails(
+                    video_path, video_id, max_thumbnails, duration
                 )
 
         except Exception as e:
@@ -58,6 +106,14 @@ class ThumbnailService:
         # Output pattern for thumbnails
         output_pattern = str(thumbnails_dir / "thumb_%03d.webp")
 
+        # Sources larger than the 720p output are downscaled before the scene
+        # metric, so it compares 1280x720 frames instead of full-resolution
+        # ones; smaller sources are only scaled for the selected frames
+        if width and height and width * height > 1280 * 720:
+            filters = "scale=1280:720,select='gt(scene,0.3)'"
+        else:
+            filters = "select='gt(scene,0.3)',scale=1280:720"
+
         try:
             # FFmpeg command for scene detection and thumbnail generation
             # select='gt(scene,0.3)' detects scene changes with threshold 0.3
@@ -65,8 +121,9 @@ class ThumbnailService:
             # -c:v libwebp forces single-image WebP encoder (not animation)
             cmd = [
                 settings.FFMPEG_PATH,
+                *hwaccel_args(),
                 '-i', video_path,
-                '-vf', f"select='gt(scene,0.3)',scale=1280:720,setpts=N/FRAME_RATE/TB",
+                '-vf', f"{filters},setpts=N/FRAME_RATE/TB",
                 '-frames:v', str(max_thumbnails),
                 '-c:v', 'libwebp',  # Force single-image WebP encoder
                 '-q:v', '2',  # Quality (1-31, lower is better) - using 2 for high quality
@@ -74,38 +131,33 @@ class ThumbnailService:
                 output_pattern
             ]
 
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120  # 2 minutes timeout
-            )
+            returncode, _, stderr = await _run(*cmd, timeout=120)  # 2 minutes timeout
 
-            if result.returncode != 0:
-                print(f"FFmpeg error: {result.stderr}")
+            if returncode != 0:
+                print(f"FFmpeg error: {stderr.decode(errors='ignore')}")
                 # Fallback: generate thumbnails at fixed intervals
-                return ThumbnailService._generate_interval_thumbnails(
-                    video_path, video_id, max_thumbnails
+                return await ThumbnailService._generate_interval_thumbnails(
+                    video_path, video_id, max_thumbnails, duration
                 )
 
             # Collect generated thumbnail paths
-            thumbnail_files = sorted(thumbnails_dir.glob("thumb_*.webp"))
-            return [str(f) for f in thumbnail_files]
+            return _list_thumbnails(thumbnails_dir)
 
-        except subprocess.TimeoutExpired:
+        except asyncio.TimeoutError:
             print(f"Thumbnail generation timeout for video {video_id}")
-            return ThumbnailService._generate_interval_thumbnails(
-                video_path, video_id, max_thumbnails
+            return await ThumbnailService._generate_interval_thumbnails(
+                video_path, video_id, max_thumbnails, duration
             )
         except Exception as e:
             print(f"Error generating thumbnails: {e}")
             return []
 
     @staticmethod
-    def _generate_interval_thumbnails(
+    async def _generate_interval_thumbnails(
         video_path: str, 
         video_id: int, 
-        count: int = 12
+        count: int = 12,
+        duration: Optional[float] = None
     ) -> List[str]:
         """
         Fallback: Generate thumbnails at regular intervals
@@ -114,6 +166,7 @@ class ThumbnailService:
             video_path: Path to video file
             video_id: Video ID
             count: Number of thumbnails to generate
+            duration: Known duration in seconds (skips the ffprobe call)
             
         Returns:
             List of generated thumbnail file paths
@@ -124,41 +177,58 @@ class ThumbnailService:
         thumbnail_paths = []
         
         try:
-            # Get video duration first
-            duration_cmd = [
-                settings.FFPROBE_PATH,
-                '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                video_path
-            ]
-            
-            result = subprocess.run(duration_cmd, capture_output=True, text=True)
-            duration = float(result.stdout.strip())
+            # Get video duration first, unless the caller already knows it
+            if not duration:
+                duration_cmd = [
+                    settings.FFPROBE_PATH,
+                    '-v', 'error',
+                    '-show_entries', 'format=duration',
+                    '-of', 'default=noprint_wrappers=1:nokey=1',
+                    video_path
+                ]
+
+                _, stdout, _ = await _run(*duration_cmd, timeout=10)
+                duration = float(stdout.decode().strip())
             
-            # Generate thumbnails at regular intervals
+            # Generate thumbnails at regular intervals in a single ffmpeg run.
+            # select keeps the first frame in each interval k*I..(k+1)*I, so
+            # picks stay on absolute marks instead of drifting from the
+            # previous pick. The first pass decodes keyframes only; if they
+            # are too sparse to land in every interval, decode every frame.
             interval = duration / (count + 1)
-            
-            for i in range(1, count + 1):
-                timestamp = interval * i
-                output_file = thumbnails_dir / f"thumb_{i:03d}.webp"
-                
+            output_pattern = thumbnails_dir / "thumb_%03d.webp"
+
+            select_expr = (
+                f"gte(t,{interval:.3f})"
+                f"*(isnan(prev_selected_t)"
+                f"+gt(floor(t/{interval:.3f}),floor(prev_selected_t/{interval:.3f})))"
+            )
+
+            for skip_args in (['-skip_frame', 'nokey'], []):
+                for stale in _list_thumbnails(thumbnails_dir):
+                    os.remove(stale)
+
                 cmd = [
                     settings.FFMPEG_PATH,
-                    '-ss', str(timestamp),
+                    '-y',
+                    *skip_args,
+                    *hwaccel_args(),
                     '-i', video_path,
-                    '-vframes', '1',
-                    '-vf', 'scale=1280:720',
+                    '-vf', f"select='{select_expr}',scale=1280:720",
+                    '-vsync', 'vfr',
+                    '-frames:v', str(count),
                     '-c:v', 'libwebp',  # Force single-image WebP encoder
                     '-q:v', '2',
-                    str(output_file)
+                    '-f', 'image2',
+                    str(output_pattern)
                 ]
-                
-                subprocess.run(cmd, capture_output=True, timeout=10)
-                
-                if output_file.exists():
-                    thumbnail_paths.append(str(output_file))
-                    
+
+                await _run(*cmd, timeout=120)
+
+                thumbnail_paths = _list_thumbnails(thumbnails_dir)
+                if len(thumbnail_paths) >= count:
+                    break
+
         except Exception as e:
             print(f"Error generating interval thumbnails: {e}")
             
@@ -171,7 +241,7 @@ class ThumbnailService:
         thumbnail_paths: List[str]
     ) -> None:
         """
-        Save generated thumbnails to database
+        Save generated thumbnails to database (flushes, caller commits)
         
         Args:
             db: Database session
@@ -181,21 +251,25 @@ class ThumbnailService:
         if not thumbnail_paths:
             return
         
-        # Create thumbnail records
-        for idx, path in enumerate(thumbnail_paths):
-            thumbnail = VideoThumbnail(
-                video_id=video.id,
-                file_path=path,
-                is_auto_generated=True,
-                is_selected=(idx == 0)  # Select first thumbnail by default
-            )
-            db.add(thumbnail)
+        # Create thumbnail records in one executemany INSERT
+        await db.execute(
+            insert(VideoThumbnail),
+            [
+                {
+                    "video_id": video.id,
+                    "file_path": path,
+                    "is_auto_generated": True,
+                    "is_selected": idx == 0  # Select first thumbnail by default
+                }
+                for idx, path in enumerate(thumbnail_paths)
+            ]
+        )
         
         # Set first thumbnail as video's thumbnail_path
         if thumbnail_paths:
             video.thumbnail_path = thumbnail_paths[0]
         
-        await db.commit()
+        await db.flush()
 
     @staticmethod
     async def select_thumbnail(
@@ -214,42 +288,62 @@ class ThumbnailService:
         Returns:
             Selected thumbnail object
         """
-        # Deselect all thumbnails for this video
-        for thumbnail in video.thumbnails:
-            thumbnail.is_selected = False
-
-        # Find and select the specified thumbnail
-        selected_thumbnail = None
-        for thumbnail in video.thumbnails:
-            if thumbnail.id == thumbnail_id:
-                thumbnail.is_selected = True
-                selected_thumbnail = thumbnail
-                video.thumbnail_path = thumbnail.file_path
-                break
+        # Select the thumbnail in SQL; video.thumbnails is never loaded
+        result = await db.execute(
+            select(VideoThumbnail)
+            .from_statement(
+                update(VideoThumbnail)
+                .where(
+                    VideoThumbnail.id == thumbnail_id,
+                    VideoThumbnail.video_id == video.id
+                )
+                .values(is_selected=True)
+                .returning(VideoThumbnail)
+            )
+            .execution_options(populate_existing=True)
+        )
+        selected_thumbnail = result.scalar_one_or_none()
 
         if not selected_thumbnail:
             raise ValueError(f"Thumbnail {thumbnail_id} not found for video {video.id}")
 
+        # Deselect the previously selected thumbnail(s)
+        await db.execute(
+            update(VideoThumbnail)
+            .where(
+                VideoThumbnail.video_id == video.id,
+                VideoThumbnail.id != thumbnail_id,
+                VideoThumbnail.is_selected.is_(True)
+            )
+            .values(is_selected=False)
+        )
+
+        video.thumbnail_path = selected_thumbnail.file_path
         await db.commit()
-        await db.refresh(selected_thumbnail)
 
         return selected_thumbnail
 
     @staticmethod
-    def generate_preview_clips(
+    async def generate_preview_clips(
         video_path: str,
         video_id: int,
         num_clips: int = 7,
-        clip_duration: int = 3
+        clip_duration: int = 3,
+        duration: Optional[float] = None
     ) -> List[str]:
         """
         Generate preview video clips from the video for hover preview
 
+        All clips come from one FFmpeg process: each clip is its own
+        fast-seeked input (-ss/-t before -i) mapped to its own output, so
+        nothing outside the clips is decoded and only one process is spawned.
+
         Args:
             video_path: Path to video file
             video_id: Video ID for creating clips directory
             num_clips: Number of preview clips to generate (default: 7)
             clip_duration: Duration of each clip in seconds (default: 5)
+            duration: Known video duration in seconds (skips the ffprobe call)
 
         Returns:
             List of generated clip file paths
@@ -258,77 +352,83 @@ class ThumbnailService:
         clips_dir = Path(settings.UPLOAD_DIR) / "thumbnails" / str(video_id)
         clips_dir.mkdir(parents=True, exist_ok=True)
 
-        clip_paths = []
-
-        try:
-            # Get video duration using FFprobe
-            duration_cmd = [
-                settings.FFPROBE_PATH,
-                '-v', 'error',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                video_path
-            ]
-
-            result = subprocess.run(duration_cmd, capture_output=True, text=True, timeout=10)
-            duration = float(result.stdout.strip())
-
-            # Calculate segment size
-            segment_size = duration / num_clips
-
-            # Generate clips from each segment
-            for i in range(num_clips):
-                # Calculate start time for this segment
-                # Start from the middle of each segment, offset by half clip duration
-                segment_middle = (i + 0.5) * segment_size
-                start_time = max(0, segment_middle - (clip_duration / 2))
-
-                # Ensure we don't go past the end of the video
-                if start_time + clip_duration > duration:
-                    start_time = max(0, duration - clip_duration)
-
-                output_file = clips_dir / f"preview_{i + 1}.mp4"
-
-                # FFmpeg command for clip extraction
-                # -ss: start time
-                # -t: duration
-                # scale=320:-1: resize to 320p width, maintain aspect ratio
-                # -c:v libx264: H.264 codec
-                # -preset veryfast: fast encoding
-                # -crf 28: quality (18-28, higher = lower quality/smaller file)
-                # -an: remove audio
-                # -movflags +faststart: optimize for streaming
-                cmd = [
-                    settings.FFMPEG_PATH,
-                    '-ss', str(start_time),
-                    '-t', str(clip_duration),
-                    '-i', video_path,
-                    '-vf', 'scale=320:-1',
-                    '-c:v', 'libx264',
-                    '-preset', 'veryfast',
-                    '-crf', '28',
-                    '-an',
-                    '-movflags', '+faststart',
-                    str(output_file)
+        if not duration:
+            try:
+                # Get video duration using FFprobe
+                duration_cmd = [
+                    settings.FFPROBE_PATH,
+                    '-v', 'error',
+                    '-show_entries', 'format=duration',
+                    '-of', 'default=noprint_wrappers=1:nokey=1',
+                    video_path
                 ]
 
-                result = subprocess.run(
-                    cmd,
-                    capture_output=True,
-                    text=True,
-                    timeout=30  # 30 seconds timeout per clip
-                )
+                _, stdout, _ = await _run(*duration_cmd, timeout=10)
+                duration = float(stdout.decode().strip())
+            except Exception as e:
+                print(f"Error generating preview clips: {e}")
+                return []
+
+        # Calculate segment size
+        segment_size = duration / num_clips
+        encoder = await resolve_video_encoder()
+
+        # FFmpeg command, per clip:
+        # -ss / -t before -i: seek the input to the clip and read only clip_duration
+        # -map N:v:0: video of that input to this clip's output
+        # scale=320:-2: resize to 320p width, maintain aspect ratio
+        # video codec: HLS_ENCODER (libx264 veryfast/crf 28 in software)
+        # -an: remove audio
+        # -movflags +faststart: optimize for streaming
+        inputs = []
+        outputs = []
+        output_files = []
+        for i in range(num_clips):
+            # Start from the middle of each segment, offset by half clip duration
+            segment_middle = (i + 0.5) * segment_size
+            start_time = max(0, segment_middle - (clip_duration / 2))
+
+            # Ensure we don't go past the end of the video
+            if start_time + clip_duration > duration:
+                start_time = max(0, duration - clip_duration)
+
+            output_file = clips_dir / f"preview_{i + 1}.mp4"
+            output_files.append(output_file)
+            inputs += [
+                *hwaccel_args(),
+                '-ss', str(start_time),
+                '-t', str(clip_duration),
+                '-i', video_path,
+            ]
+            outputs += [
+                '-map', f'{i}:v:0',
+                '-vf', 'scale=320:-2',
+                *preview_encoder_args(encoder),
+                '-an',
+                '-movflags', '+faststart',
+                str(output_file),
+            ]
 
-                if result.returncode == 0 and output_file.exists():
-                    clip_paths.append(str(output_file))
-                    print(f"Generated preview clip {i + 1}/{num_clips} at {start_time:.2f}s")
-                else:
-                    print(f"Failed to generate preview clip {i + 1}: {result.stderr}")
+        cmd = encode_command(['-y', *inputs, *outputs])
 
+        try:
+            # 30 seconds timeout per clip
+            async with _preview_semaphore:
+                returncode, _, stderr = await _run(*cmd, timeout=30 * num_clips)
+        except asyncio.TimeoutError:
+            returncode, stderr = None, b"timeout"
         except Exception as e:
-            print(f"Error generating preview clips: {e}")
+            returncode, stderr = None, str(e).encode()
 
-        return clip_paths
+        if returncode != 0:
+            print(f"Failed to generate preview clips: {stderr.decode(errors='ignore')[-500:]}")
+            # Don't leave a partial set of clips behind
+            for output_file in output_files:
+                output_file.unlink(missing_ok=True)
+            return []
 
+        clip_paths = [str(f) for f in output_files if f.exists()]
+        print(f"Generated {len(clip_paths)}/{num_clips} preview clips")
+        return clip_paths
 
 thumbnail_service = ThumbnailService()
@@ -2,17 +2,41 @@
 Video transcoding service for on-demand quality conversion
 """
 import os
+import json
+import uuid
 import asyncio
 from pathlib import Path
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 import logging
-import time
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.tasks import spawn
+from app.core.ffmpeg import (
+    encode_command,
+    encode_cpu_count,
+    encoder_thread_args,
+    hwaccel_args,
+    resolve_video_encoder,
+    transcode_encoder_args,
+)
 
 logger = logging.getLogger(__name__)
 
-# Cache for validated files: {file_path: (is_valid, timestamp)}
-_validation_cache: dict[str, tuple[bool, float]] = {}
-VALIDATION_CACHE_TTL = 300  # 5 minutes
+# FFprobe validity per file version: {(path, mtime_ns, size): is_valid}
+_validation_cache = TTLCache(maxsize=4096)
+
+# Each on-demand transcode can saturate every encode CPU, so only a few run
+# at once and the CPUs are split between them; the rest queue here
+TRANSCODE_CONCURRENCY = settings.TRANSCODE_CONCURRENCY or max(1, encode_cpu_count() // 4)
+_transcode_semaphore = asyncio.Semaphore(TRANSCODE_CONCURRENCY)
+
+# In-flight transcode_video jobs by output path, so repeated requests for a
+# missing quality (e.g. every player range request) share one encode
+_transcode_tasks: dict[str, asyncio.Task] = {}
+
+# Timeout for a transcode whose source duration can't be determined
+DEFAULT_TRANSCODE_TIMEOUT = 3600
 
 # Quality presets
 QualityType = Literal["480p", "720p", "1080p", "4k", "original"]
@@ -79,10 +103,79 @@ def get_transcoded_path(original_path: str, quality: QualityType) -> str:
     return str(transcoded_file)
 
 
-def is_valid_video_file(video_path: str, use_cache: bool = True) -> bool:
+async def _probe_video(video_path: str, timeout: Optional[float] = None) -> Optional[dict]:
+    """
+    Probe a file's format and first video stream with a single FFprobe JSON call.
+
+    Args:
+        video_path: Path to video file
+        timeout: Optional FFprobe timeout in seconds
+
+    Returns:
+        {"stream": {codec_type, width, height, ...}, "format": {duration, ...}},
+        or None if the file has no video stream
+    """
+    command = [
+        "ffprobe",
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        "-select_streams", "v:0",
+        video_path
+    ]
+
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        return None
+
+    data = json.loads(stdout)
+    streams = data.get("streams") or []
+    if not streams:
+        return None
+    return {"stream": streams[0], "format": data.get("format") or {}}
+
+
+async def _transcode_timeout(input_path: str, duration: Optional[float] = None) -> float:
+    """
+    Upper bound in seconds for transcoding input_path before FFmpeg is killed.
+
+    Args:
+        input_path: Path to source video
+        duration: Known duration in seconds (e.g. Video.duration); probed if missing
+
+    Returns:
+        max(60, duration * TRANSCODE_TIMEOUT_FACTOR), or DEFAULT_TRANSCODE_TIMEOUT
+        if the duration is unknown
+    """
+    if not duration:
+        try:
+            probe = await _probe_video(input_path, timeout=30)
+            duration = float(probe["format"].get("duration") or 0) if probe else 0
+        except Exception:
+            duration = 0
+
+    if not duration:
+        return DEFAULT_TRANSCODE_TIMEOUT
+    return max(60, duration * settings.TRANSCODE_TIMEOUT_FACTOR)
+
+
+async def is_valid_video_file(video_path: str, use_cache: bool = True) -> bool:
     """
     Verify that a video file is valid and playable using FFprobe.
-    Uses caching to avoid repeated ffprobe calls.
+    Results are cached per file version (path, mtime, size), so a rewritten
+    file is probed again; failed probes are not cached.
 
     Args:
         video_path: Path to video file
@@ -91,33 +184,31 @@ def is_valid_video_file(video_path: str, use_cache: bool = True) -> bool:
     Returns:
         True if file is valid
     """
-    if not os.path.exists(video_path):
+    try:
+        st = os.stat(video_path)
+    except OSError:
         return False
 
-    # Check cache first
-    if use_cache and video_path in _validation_cache:
-        is_valid, timestamp = _validation_cache[video_path]
-        # If cache is still fresh, return cached result
-        if time.time() - timestamp < VALIDATION_CACHE_TTL:
-            return is_valid
+    # Reuse the result for this exact file version
+    cache_key = (video_path, st.st_mtime_ns, st.st_size)
+    if use_cache:
+        cached = _validation_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     # Validate with ffprobe
     try:
-        import subprocess
-        command = [
-            "ffprobe",
-            "-v", "error",
-            "-select_streams", "v:0",
-            "-show_entries", "stream=codec_type",
-            "-of", "default=noprint_wrappers=1:nokey=1",
-            video_path
-        ]
-        result = subprocess.run(command, capture_output=True, text=True, timeout=5)
-        is_valid = result.returncode == 0 and "video" in result.stdout
+        # A truncated file (e.g. missing moov atom) can still list a video
+        # stream, so also require a positive container duration
+        probe = await _probe_video(video_path, timeout=5)
+        is_valid = (
+            probe is not None
+            and probe["stream"].get("codec_type") == "video"
+            and float(probe["format"].get("duration") or 0) > 0
+        )
 
-        # Cache the result
         if use_cache:
-            _validation_cache[video_path] = (is_valid, time.time())
+            _validation_cache.set(cache_key, is_valid)
 
         return is_valid
     except Exception as e:
@@ -125,7 +216,7 @@ def is_valid_video_file(video_path: str, use_cache: bool = True) -> bool:
         return False
 
 
-def is_transcoded_available(original_path: str, quality: QualityType) -> bool:
+async def is_transcoded_available(original_path: str, quality: QualityType) -> bool:
     """
     Check if a transcoded version already exists and is valid.
 
@@ -146,7 +237,7 @@ def is_transcoded_available(original_path: str, quality: QualityType) -> bool:
         return False
 
     # Check if file is valid (not corrupted or incomplete)
-    if not is_valid_video_file(transcoded_path):
+    if not await is_valid_video_file(transcoded_path):
         logger.warning(f"Transcoded file exists but is invalid, removing: {transcoded_path}")
         try:
             os.remove(transcoded_path)
@@ -157,22 +248,58 @@ def is_transcoded_available(original_path: str, quality: QualityType) -> bool:
     return True
 
 
+def _quality_output_args(quality: QualityType, encoder: str) -> List[str]:
+    """Codec and bitrate arguments for one quality preset's output"""
+    preset = QUALITY_SETTINGS[quality]
+    return [
+        *transcode_encoder_args(encoder, preset["bitrate"]),
+        "-c:a", "aac",
+        "-b:a", preset["audio_bitrate"],
+    ]
+
+
+def _temp_output_path(output_path: str) -> str:
+    """Unique temporary path next to output_path, renamed into place on success"""
+    return f"{output_path}.{uuid.uuid4().hex}.part"
+
+
 async def transcode_video(
     input_path: str,
     output_path: str,
-    quality: QualityType
+    quality: QualityType,
+    duration: Optional[float] = None
 ) -> bool:
     """
     Transcode video to specified quality using FFmpeg.
 
+    Concurrent calls for the same output_path wait on a single encode.
+
     Args:
         input_path: Path to source video
         output_path: Path to save transcoded video
         quality: Quality preset (480p, 720p, 1080p, 4k)
+        duration: Known source duration, used for the FFmpeg timeout
 
     Returns:
-        True if successful, False otherwise
+        True if successful, False otherwise (including timeout)
     """
+    task = _transcode_tasks.get(output_path)
+    if task is None:
+        task = asyncio.create_task(_transcode_video(input_path, output_path, quality, duration))
+        _transcode_tasks[output_path] = task
+        task.add_done_callback(lambda _: _transcode_tasks.pop(output_path, None))
+
+    # One caller going away must not cancel the encode others are waiting on
+    return await asyncio.shield(task)
+
+
+async def _transcode_video(
+    input_path: str,
+    output_path: str,
+    quality: QualityType,
+    duration: Optional[float]
+) -> bool:
+    """transcode_video without the in-flight de-duplication"""
     if quality == "original":
         return True  # No transcoding needed
 
@@ -180,83 +307,206 @@ async def transcode_video(
         logger.error(f"Invalid quality preset: {quality}")
         return False
 
-    settings = QUALITY_SETTINGS[quality]
+    preset = QUALITY_SETTINGS[quality]
 
     # Ensure output directory exists
     os.makedirs(Path(output_path).parent, exist_ok=True)
 
     # FFmpeg command
+    # -hwaccel: optional hardware decoding (FFMPEG_HWACCEL)
     # -i: input file
     # -vf scale: resize video
-    # -c:v libx264: H.264 codec
-    # -preset medium: encoding speed/quality balance
-    # -crf 23: quality (lower = better, 23 is good default)
+    # video codec: HLS_ENCODER (libx264 -preset veryfast -crf 23 in software)
     # -b:v: video bitrate
     # -c:a aac: audio codec
     # -b:a: audio bitrate
+    # -threads: decoder/encoder threads, the encode CPUs split across
+    #           TRANSCODE_CONCURRENCY jobs (or FFMPEG_THREADS if set)
+    # -fflags +genpts / -avoid_negative_ts make_zero: clean, seekable timestamps
     # -movflags +faststart: optimize for streaming
     # -y: overwrite output file
-
-    command = [
-        "ffmpeg",
+    # Output goes to a uniquely named .part file that is renamed into place on
+    # success, so a crashed or failed encode never leaves a half-written file
+    # at output_path and concurrent encodes never share a file
+
+    temp_path = _temp_output_path(output_path)
+    timeout = await _transcode_timeout(input_path, duration)
+    encoder = await resolve_video_encoder()
+    thread_args = encoder_thread_args(jobs=TRANSCODE_CONCURRENCY)
+    command = encode_command([
+        *hwaccel_args(),
+        *thread_args,
+        "-fflags", "+genpts",
         "-i", input_path,
-        "-vf", f"scale={settings['width']}:{settings['height']}",
-        "-c:v", "libx264",
-        "-preset", "medium",
-        "-crf", "23",
-        "-b:v", settings["bitrate"],
-        "-c:a", "aac",
-        "-b:a", settings["audio_bitrate"],
+        "-vf", f"scale={preset['width']}:{preset['height']}",
+        *_quality_output_args(quality, encoder),
+        *thread_args,
+        "-avoid_negative_ts", "make_zero",
         "-movflags", "+faststart",
+        "-f", "mp4",
         "-y",  # Overwrite output
-        output_path
-    ]
+        temp_path
+    ])
 
     try:
         logger.info(f"Starting transcoding: {input_path} -> {output_path} ({quality})")
 
-        # Run FFmpeg asynchronously
-        process = await asyncio.create_subprocess_exec(
-            *command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+        # Run FFmpeg asynchronously, at most TRANSCODE_CONCURRENCY at a time
+        async with _transcode_semaphore:
+            # Another job (e.g. transcode_all_qualities) may have produced
+            # this file while we were queued
+            if os.path.exists(output_path) and await is_valid_video_file(output_path):
+                logger.info(f"Transcoded file appeared while queued: {output_path}")
+                return True
 
-        stdout, stderr = await process.communicate()
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.error(f"Transcoding timed out after {timeout:.0f}s: {input_path} ({quality})")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return False
 
         if process.returncode == 0:
-            print(f"[TRANSCODING] ✅ SUCCESS: {output_path}")
+            os.replace(temp_path, output_path)
             logger.info(f"Transcoding completed: {output_path}")
 
             # Verify the file is valid
             if os.path.exists(output_path):
                 file_size = os.path.getsize(output_path)
-                print(f"[TRANSCODING] File size: {file_size} bytes")
+                logger.debug(f"Transcoded file size: {file_size} bytes")
                 if file_size < 1000:  # Less than 1KB is suspicious
-                    print(f"[TRANSCODING] ⚠️ WARNING: File size too small, might be corrupted")
+                    logger.warning(f"Transcoded file is only {file_size} bytes, might be corrupted: {output_path}")
 
             return True
         else:
             error_message = stderr.decode() if stderr else "No error message"
-            print(f"[TRANSCODING] ❌ FAILED with return code {process.returncode}")
-            print(f"[TRANSCODING] Error: {error_message[:500]}")  # First 500 chars
             logger.error(f"Transcoding failed (code {process.returncode}): {error_message}")
 
             # Clean up partial file
-            if os.path.exists(output_path):
-                os.remove(output_path)
-                print(f"[TRANSCODING] Cleaned up partial file: {output_path}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+                logger.debug(f"Cleaned up partial file: {temp_path}")
             return False
 
     except Exception as e:
         logger.error(f"Transcoding error: {str(e)}")
         # Clean up partial file
-        if os.path.exists(output_path):
-            os.remove(output_path)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         return False
 
 
-def get_video_resolution(video_path: str) -> tuple[int, int]:
+async def transcode_all_qualities(
+    input_path: str,
+    source_height: Optional[int] = None,
+    qualities: Optional[List[QualityType]] = None,
+    duration: Optional[float] = None
+) -> List[str]:
+    """
+    Transcode a video to several qualities in a single FFmpeg run.
+
+    The source is demuxed and decoded once and split into one scaled output
+    per quality, instead of one full decode per quality. Qualities at or
+    above the source height are skipped (should_use_original serves those).
+    Outputs are written to temporary files and renamed into place, so
+    get_video_for_quality never sees a half-written file.
+
+    Args:
+        input_path: Path to source video
+        source_height: Known source height (e.g. Video.height); probed if missing
+        qualities: Qualities to generate (default: 480p, 720p, 1080p)
+        duration: Known source duration (e.g. Video.duration), used for the FFmpeg timeout
+
+    Returns:
+        List of transcoded file paths (empty if nothing was needed or it failed)
+    """
+    if qualities is None:
+        qualities = ["480p", "720p", "1080p"]
+
+    if not source_height:
+        _, source_height = await get_video_resolution(input_path)
+
+    targets = [
+        q for q in qualities
+        if q in QUALITY_SETTINGS
+        and QUALITY_SETTINGS[q]["height"] < source_height
+        and not await is_transcoded_available(input_path, q)
+    ]
+    if not targets:
+        return []
+
+    # [0:v]split=N[s0][s1]...; [s0]scale=854:480[o0]; ...
+    filter_complex = f"[0:v]split={len(targets)}" + "".join(f"[s{i}]" for i in range(len(targets)))
+    for i, quality in enumerate(targets):
+        preset = QUALITY_SETTINGS[quality]
+        filter_complex += f";[s{i}]scale={preset['width']}:{preset['height']}[o{i}]"
+
+    timeout = await _transcode_timeout(input_path, duration)
+    encoder = await resolve_video_encoder()
+    thread_args = encoder_thread_args(jobs=TRANSCODE_CONCURRENCY)
+    outputs = []
+    args = ["-y", *hwaccel_args(), *thread_args, "-i", input_path, "-filter_complex", filter_complex]
+    for i, quality in enumerate(targets):
+        final_path = get_transcoded_path(input_path, quality)
+        temp_path = _temp_output_path(final_path)
+        outputs.append((temp_path, final_path))
+        args += [
+            "-map", f"[o{i}]",
+            "-map", "0:a?",
+            *_quality_output_args(quality, encoder),
+            *thread_args,
+            "-movflags", "+faststart",
+            "-f", "mp4",
+            temp_path,
+        ]
+
+    try:
+        logger.info(f"Starting multi-quality transcoding: {input_path} -> {', '.join(targets)}")
+
+        async with _transcode_semaphore:
+            process = await asyncio.create_subprocess_exec(
+                *encode_command(args),
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                logger.error(f"Multi-quality transcoding timed out after {timeout:.0f}s: {input_path}")
+                return []
+
+        if process.returncode != 0:
+            error_message = stderr.decode(errors="ignore") if stderr else "No error message"
+            logger.error(f"Multi-quality transcoding failed (code {process.returncode}): {error_message[-500:]}")
+            return []
+
+        for temp_path, final_path in outputs:
+            os.replace(temp_path, final_path)
+        logger.info(f"Multi-quality transcoding completed: {input_path}")
+        return [final_path for _, final_path in outputs]
+
+    except Exception as e:
+        logger.error(f"Multi-quality transcoding error: {str(e)}")
+        return []
+
+    finally:
+        for temp_path, _ in outputs:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+async def get_video_resolution(video_path: str) -> tuple[int, int]:
     """
     Get video resolution using FFprobe.
 
@@ -267,26 +517,10 @@ def get_video_resolution(video_path: str) -> tuple[int, int]:
         Tuple of (width, height), or (0, 0) if failed
     """
     try:
-        import subprocess
-        import json
-
-        command = [
-            "ffprobe",
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_streams",
-            "-select_streams", "v:0",
-            video_path
-        ]
-
-        result = subprocess.run(command, capture_output=True, text=True)
-        data = json.loads(result.stdout)
-
-        if "streams" in data and len(data["streams"]) > 0:
-            stream = data["streams"][0]
-            width = stream.get("width", 0)
-            height = stream.get("height", 0)
-            return (width, height)
+        probe = await _probe_video(video_path)
+        if probe:
+            stream = probe["stream"]
+            return (stream.get("width", 0), stream.get("height", 0))
 
     except Exception as e:
         logger.error(f"Failed to get video resolution: {e}")
@@ -294,7 +528,12 @@ def get_video_resolution(video_path: str) -> tuple[int, int]:
     return (0, 0)
 
 
-def should_use_original(original_path: str, quality: QualityType) -> bool:
+async def should_use_original(
+    original_path: str,
+    quality: QualityType,
+    width: Optional[int] = None,
+    height: Optional[int] = None
+) -> bool:
     """
     Check if we should use original file instead of transcoding.
     Returns True if requested quality is >= original resolution.
@@ -302,6 +541,8 @@ def should_use_original(original_path: str, quality: QualityType) -> bool:
     Args:
         original_path: Path to original video
         quality: Requested quality
+        width: Known original width (e.g. Video.width); probed if missing
+        height: Known original height (e.g. Video.height); probed if missing
 
     Returns:
         True if original should be used
@@ -309,8 +550,11 @@ def should_use_original(original_path: str, quality: QualityType) -> bool:
     if quality == "original":
         return True
 
-    # Get original resolution
-    orig_width, orig_height = get_video_resolution(original_path)
+    # Get original resolution, probing only if the caller doesn't know it
+    if width and height:
+        orig_width, orig_height = width, height
+    else:
+        orig_width, orig_height = await get_video_resolution(original_path)
 
     if orig_width == 0 or orig_height == 0:
         # Can't determine resolution, default to transcoding
@@ -335,7 +579,10 @@ def should_use_original(original_path: str, quality: QualityType) -> bool:
 async def get_video_for_quality(
     original_path: str,
     quality: QualityType,
-    transcode_in_background: bool = False
+    transcode_in_background: bool = False,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    duration: Optional[float] = None
 ) -> Optional[str]:
     """
     Get video file path for requested quality.
@@ -347,6 +594,9 @@ async def get_video_for_quality(
         original_path: Path to original video
         quality: Requested quality
         transcode_in_background: Whether to transcode in background
+        width: Known original width from the Video row (skips ffprobe)
+        height: Known original height from the Video row (skips ffprobe)
+        duration: Known original duration from the Video row (transcode timeout)
 
     Returns:
         Path to video file (original or transcoded)
@@ -360,24 +610,20 @@ async def get_video_for_quality(
         return None
 
     # Check if we should just use original (e.g., original is 1080p, user wants 4K)
-    if should_use_original(original_path, quality):
-        print(f"[TRANSCODING] Using original file for {quality} request (no upscaling)")
+    if await should_use_original(original_path, quality, width=width, height=height):
         logger.info(f"Using original file for {quality} request (no upscaling)")
         return original_path
 
     # Get transcoded path
     transcoded_path = get_transcoded_path(original_path, quality)
-    print(f"[TRANSCODING] Transcoded path: {transcoded_path}")
 
     # If already transcoded, validate and return cached version
     if os.path.exists(transcoded_path):
-        print(f"[TRANSCODING] Found cached file, validating: {transcoded_path}")
-        if is_valid_video_file(transcoded_path):
-            print(f"[TRANSCODING] ✓ Using valid cached file: {transcoded_path}")
+        logger.debug(f"Found cached file, validating: {transcoded_path}")
+        if await is_valid_video_file(transcoded_path):
             logger.info(f"Using cached transcoded file: {transcoded_path}")
             return transcoded_path
         else:
-            print(f"[TRANSCODING] ✗ Cached file is invalid/incomplete, removing: {transcoded_path}")
             logger.warning(f"Cached file is invalid, removing: {transcoded_path}")
             try:
                 os.remove(transcoded_path)
@@ -385,33 +631,28 @@ async def get_video_for_quality(
                 logger.error(f"Failed to remove invalid cached file: {e}")
 
     # Need to transcode
-    print(f"[TRANSCODING] Need to transcode. Cache not found: {transcoded_path}")
     logger.info(f"Transcoded file not found: {transcoded_path}")
 
     if transcode_in_background:
         # Start transcoding in background, return original for now
-        print(f"[TRANSCODING] Starting background transcoding for {quality}")
         logger.info(f"Starting background transcoding for {quality}")
-        asyncio.create_task(transcode_video(original_path, transcoded_path, quality))
+        spawn(transcode_video(original_path, transcoded_path, quality, duration))
         return original_path
     else:
         # Transcode synchronously (user waits)
-        print(f"[TRANSCODING] Starting SYNCHRONOUS transcoding for {quality}")
-        print(f"[TRANSCODING] This may take several minutes...")
         logger.info(f"Starting synchronous transcoding for {quality}")
-        success = await transcode_video(original_path, transcoded_path, quality)
+        success = await transcode_video(original_path, transcoded_path, quality, duration)
 
         if success:
-            print(f"[TRANSCODING] Transcoding completed successfully: {transcoded_path}")
+            logger.debug(f"Synchronous transcoding completed: {transcoded_path}")
             return transcoded_path
         else:
             # Fallback to original if transcoding failed
-            print(f"[TRANSCODING] Transcoding FAILED, falling back to original")
             logger.warning(f"Transcoding failed, falling back to original")
             return original_path
 
 
-def get_available_qualities(original_path: str) -> list[str]:
+async def get_available_qualities(original_path: str) -> list[str]:
     """
     Get list of available qualities for a video.
 
@@ -421,13 +662,14 @@ def get_available_qualities(original_path: str) -> list[str]:
     Returns:
         List of available quality strings (e.g., ["original", "720p", "1080p"])
     """
-    qualities = ["original"]
-
-    for quality in ["480p", "720p", "1080p", "4k"]:
-        if is_transcoded_available(original_path, quality):
-            qualities.append(quality)
+    candidates = ["480p", "720p", "1080p", "4k"]
 
-    return qualities
+    # Validation is cached per file version, so only new or rewritten
+    # files are probed, and those probes run concurrently
+    available = await asyncio.gather(
+        *(is_transcoded_available(original_path, quality) for quality in candidates)
+    )
+    return ["original"] + [q for q, ok in zip(candidates, available) if ok]
 
 
 def delete_transcoded_files(original_path: str):
@@ -438,13 +680,26 @@ def delete_transcoded_files(original_path: str):
     Args:
         original_path: Path to original video
     """
-    video_dir = Path(original_path).parent
+    # Uploads share one flat directory, so unlink the known names directly;
+    # a missing file is the common case
+    paths = [get_transcoded_path(original_path, quality) for quality in QUALITY_SETTINGS]
 
-    for quality in ["480p", "720p", "1080p", "4k"]:
-        transcoded_file = video_dir / f"{quality}.mp4"
-        if transcoded_file.exists():
-            try:
-                transcoded_file.unlink()
-                logger.info(f"Deleted transcoded file: {transcoded_file}")
-            except Exception as e:
-                logger.error(f"Failed to delete {transcoded_file}: {e}")
+    # Leftover .part files have random suffixes, so find them in one listing
+    prefixes = tuple(f"{os.path.basename(path)}." for path in paths)
+    try:
+        with os.scandir(os.path.dirname(original_path) or ".") as entries:
+            paths += [
+                entry.path for entry in entries
+                if entry.name.endswith(".part") and entry.name.startswith(prefixes)
+            ]
+    except OSError as e:
+        logger.error(f"Failed to list partial transcodes for {original_path}: {e}")
+
+    for path in paths:
+        try:
+            os.remove(path)
+            logger.info(f"Deleted transcoded file: {path}")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Failed to delete {path}: {e}")
@@ -1,7 +1,8 @@
+import asyncio
 from datetime import datetime
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, func, update
 
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
@@ -19,21 +20,21 @@ class UserService:
 
     @staticmethod
     async def get_by_email(db: AsyncSession, email: str) -> Optional[User]:
-        """Get user by email"""
-        result = await db.execute(select(User).where(User.email == email))
+        """Get user by email (case-insensitive)"""
+        result = await db.execute(select(User).where(func.lower(User.email) == email.lower()))
         return result.scalar_one_or_none()
 
     @staticmethod
     async def get_by_username(db: AsyncSession, username: str) -> Optional[User]:
-        """Get user by username"""
-        result = await db.execute(select(User).where(User.username == username))
+        """Get user by username (case-insensitive)"""
+        result = await db.execute(select(User).where(func.lower(User.username) == username.lower()))
         return result.scalar_one_or_none()
 
     @staticmethod
     async def create(db: AsyncSession, user_in: UserCreate, role: UserRole = UserRole.USER) -> User:
         """Create a new user"""
-        # Hash password
-        hashed_password = get_password_hash(user_in.password)
+        # Hash password (bcrypt is slow by design; keep it off the event loop)
+        hashed_password = await asyncio.to_thread(get_password_hash, user_in.password)
 
         # Create user
         user = User(
@@ -58,7 +59,7 @@ class UserService:
             user.full_name = user_in.full_name
 
         if user_in.password is not None:
-            user.hashed_password = get_password_hash(user_in.password)
+            user.hashed_password = await asyncio.to_thread(get_password_hash, user_in.password)
 
         user.updated_at = datetime.utcnow()
 
@@ -72,16 +73,24 @@ class UserService:
         user = await UserService.get_by_email(db, email)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not await asyncio.to_thread(verify_password, password, user.hashed_password):
             return None
         return user
 
     @staticmethod
     async def update_last_login(db: AsyncSession, user: User) -> User:
-        """Update user's last login timestamp"""
-        user.last_login = datetime.utcnow()
+        """
+        Update user's last login timestamp
+
+        A single UPDATE of the one column; the in-session user is synced by
+        the ORM, so no refresh SELECT follows the commit.
+        """
+        await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(last_login=datetime.utcnow())
+        )
         await db.commit()
-        await db.refresh(user)
         return user
 
 
@@ -1,16 +1,55 @@
 import os
-import subprocess
+import asyncio
+import contextlib
 import json
-from typing import List, Optional
+import shutil
+from typing import List, Optional, Tuple
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, func
+from sqlalchemy import ARRAY, Integer, and_, any_, asc, cast, desc, exists, func, insert, or_, select, update
+from sqlalchemy.engine import RowMapping
 from fastapi import UploadFile
 
+from app.models.associations import video_tags
 from app.models.video import Video, VideoStatus
 from app.models.user import User
 from app.schemas.video import VideoCreate, VideoUpdate
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.services import mp4_probe, transcoding_service
+
+# Columns serialized by VideoListResponse; list queries select only these
+LIST_COLUMNS = (
+    Video.id,
+    Video.title,
+    Video.description,
+    Video.file_size,
+    Video.thumbnail_path,
+    Video.duration,
+    Video.width,
+    Video.height,
+    Video.status,
+    Video.view_count,
+    Video.avg_rating,
+    Video.rating_count,
+    Video.created_at,
+    User.username.label("uploader_username"),
+)
+
+# Extracted metadata per file version: {(abspath, mtime_ns, size): metadata}
+_metadata_cache = TTLCache(maxsize=4096)
+
+# Concurrent ffprobe fallbacks (bulk reprocessing shouldn't fork one per video at once)
+_ffprobe_semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+
+def _parse_frame_rate(rate: str) -> float:
+    """Parse an ffprobe rational like '30000/1001' (0.0 if unparsable)"""
+    num, _, den = rate.partition('/')
+    try:
+        return float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return 0.0
 
 
 class VideoService:
@@ -23,63 +62,43 @@ class VideoService:
         return result.scalar_one_or_none()
 
     @staticmethod
-    async def get_all(
-        db: AsyncSession,
-        skip: int = 0,
-        limit: int = 20,
-        status: Optional[VideoStatus] = VideoStatus.READY,
-        tag_ids: Optional[List[int]] = None,
-        sort_by: str = "created_at",
-        order: str = "desc"
-    ) -> List[Video]:
+    async def get_file_path(db: AsyncSession, video_id: int) -> Optional[str]:
         """
-        Get all videos with optional tag filtering and sorting
+        Get only the file path of a video.
 
-        Args:
-            sort_by: created_at, view_count, rating
-            order: asc, desc
+        Selects a single column, so no ORM instance is built or tracked
+        by the session. Used by the hot HLS/streaming read paths.
         """
-        from sqlalchemy.orm import selectinload
-        from sqlalchemy import asc
-        from app.models.associations import video_tags
-        from app.models.rating import Rating
+        result = await db.execute(select(Video.file_path).where(Video.id == video_id))
+        return result.scalar_one_or_none()
 
-        query = select(Video).options(selectinload(Video.uploader), selectinload(Video.tags))
+    @staticmethod
+    def _list_query(
+        status: Optional[VideoStatus],
+        tag_ids: Optional[List[int]],
+        sort_by: str,
+        order: str
+    ):
+        """Build the filtered, sorted list SELECT shared by get_all and get_all_with_count"""
+        query = select(*LIST_COLUMNS).join(User, Video.user_id == User.id)
 
         if status:
             query = query.where(Video.status == status)
 
-        # Filter by tags if provided
+        # Filter by tags if provided (EXISTS semi-join: no duplicate rows to
+        # DISTINCT away, so ORDER BY ... LIMIT can stop early)
         if tag_ids:
-            # Join with video_tags and filter by tag IDs
-            query = (
-                query
-                .join(video_tags, Video.id == video_tags.c.video_id)
-                .where(video_tags.c.tag_id.in_(tag_ids))
-                .distinct()
+            query = query.where(
+                exists().where(
+                    video_tags.c.video_id == Video.id,
+                    video_tags.c.tag_id.in_(tag_ids)
+                )
             )
 
         # Apply sorting
         if sort_by == "rating":
-            # Subquery to calculate average rating per video
-            rating_subquery = (
-                select(
-                    Rating.video_id,
-                    func.avg(Rating.score).label('avg_rating')
-                )
-                .group_by(Rating.video_id)
-                .subquery()
-            )
-
-            # Left join to include videos without ratings
-            query = query.outerjoin(
-                rating_subquery,
-                Video.id == rating_subquery.c.video_id
-            )
-
-            # Use coalesce to handle NULL ratings (videos without any ratings)
-            # They will be sorted last when descending, first when ascending
-            sort_column = func.coalesce(rating_subquery.c.avg_rating, 0)
+            # Denormalized average (0 for videos without ratings)
+            sort_column = Video.avg_rating
         elif sort_by == "view_count":
             sort_column = Video.view_count
         else:  # created_at
@@ -87,13 +106,69 @@ class VideoService:
 
         # Apply order
         if order == "asc":
-            query = query.order_by(asc(sort_column))
-        else:
-            query = query.order_by(desc(sort_column))
+            return query.order_by(asc(sort_column))
+        return query.order_by(desc(sort_column))
 
+    @staticmethod
+    async def get_all(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 20,
+        status: Optional[VideoStatus] = VideoStatus.READY,
+        tag_ids: Optional[List[int]] = None,
+        sort_by: str = "created_at",
+        order: str = "desc"
+    ) -> List[RowMapping]:
+        """
+        Get all videos with optional tag filtering and sorting
+
+        Returns plain rows with the VideoListResponse columns only;
+        no ORM instances are built.
+
+        Args:
+            sort_by: created_at, view_count, rating
+            order: asc, desc
+        """
+        query = VideoService._list_query(status, tag_ids, sort_by, order)
         query = query.offset(skip).limit(limit)
         result = await db.execute(query)
-        return list(result.scalars().all())
+        return list(result.mappings().all())
+
+    @staticmethod
+    async def get_all_with_count(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 20,
+        status: Optional[VideoStatus] = VideoStatus.READY,
+        tag_ids: Optional[List[int]] = None,
+        sort_by: str = "created_at",
+        order: str = "desc"
+    ) -> Tuple[List[RowMapping], int]:
+        """
+        Get a page of videos and the total match count in one query
+
+        The total comes from count(*) OVER () on the same filtered SELECT,
+        so the filters run once instead of again in count_all. Rows also
+        carry that "total" column.
+
+        Returns:
+            (rows, total)
+        """
+        query = (
+            VideoService._list_query(status, tag_ids, sort_by, order)
+            .add_columns(func.count().over().label("total"))
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await db.execute(query)
+        videos = list(result.mappings().all())
+
+        if videos:
+            return videos, videos[0]["total"]
+        # A page past the end has no rows to carry the total
+        if skip:
+            return videos, await VideoService.count_all(db, status=status, tag_ids=tag_ids)
+        return videos, 0
 
     @staticmethod
     async def count_all(
@@ -102,25 +177,59 @@ class VideoService:
         tag_ids: Optional[List[int]] = None
     ) -> int:
         """Count all videos with optional tag filtering"""
-        from app.models.associations import video_tags
-
         query = select(func.count(Video.id))
 
         if status:
             query = query.where(Video.status == status)
 
-        # Filter by tags if provided
+        # Filter by tags if provided (EXISTS, so a video with several of
+        # the tags is counted once)
         if tag_ids:
-            query = (
-                query
-                .join(video_tags, Video.id == video_tags.c.video_id)
-                .where(video_tags.c.tag_id.in_(tag_ids))
-                .distinct()
+            query = query.where(
+                exists().where(
+                    video_tags.c.video_id == Video.id,
+                    video_tags.c.tag_id.in_(tag_ids)
+                )
             )
 
         result = await db.execute(query)
         return result.scalar() or 0
 
+    @staticmethod
+    async def get_batch_after(
+        db: AsyncSession,
+        *columns,
+        after_id: int = 0,
+        status: Optional[VideoStatus] = None,
+        limit: int = 500
+    ) -> List[RowMapping]:
+        """
+        Get the next batch of videos with id > after_id, in id order
+
+        Keyset pagination for bulk/maintenance scripts that walk all
+        videos: pass the last id of one batch as after_id for the next.
+        Each batch is one indexed query, so callers can fetch it in a
+        short-lived session and release the connection before doing
+        slow per-video work.
+
+        Args:
+            columns: Video columns to select (e.g. Video.id, Video.file_path)
+            after_id: Return only videos with a greater id
+            status: Optional status filter
+            limit: Maximum rows per batch
+        """
+        query = (
+            select(*columns)
+            .where(Video.id > after_id)
+            .order_by(Video.id)
+            .limit(limit)
+        )
+        if status:
+            query = query.where(Video.status == status)
+
+        result = await db.execute(query)
+        return list(result.mappings())
+
     @staticmethod
     async def get_by_user(
         db: AsyncSession,
@@ -149,7 +258,7 @@ class VideoService:
         include_tags: Optional[List[int]] = None,
         exclude_tags: Optional[List[int]] = None,
         status: Optional[VideoStatus] = VideoStatus.READY
-    ) -> List[Video]:
+    ) -> List[RowMapping]:
         """
         Search videos by title, description, or uploader username with advanced tag filtering
 
@@ -163,38 +272,39 @@ class VideoService:
             status: Video status filter
 
         Returns:
-            List of matching videos
+            List of matching rows with the VideoListResponse columns
         """
-        from sqlalchemy.orm import selectinload
-        from sqlalchemy import or_, and_, exists
-        from app.models.associations import video_tags
-
-        # Build base query with relationships
-        query = select(Video).options(
-            selectinload(Video.uploader),
-            selectinload(Video.tags)
-        )
+        query = select(*LIST_COLUMNS).join(User, Video.user_id == User.id)
 
         # Filter by status
         if status:
             query = query.where(Video.status == status)
 
         # Search in title, description, and uploader username
+        # Every branch is on videos (uploaders are resolved to an id array
+        # once), so the planner can OR the trigram / user_id index scans
         if query_text:
+            pattern = f"%{query_text}%"
+            uploader_ids = (
+                select(func.array_agg(User.id))
+                .where(User.username.ilike(pattern))
+                .scalar_subquery()
+            )
             search_filter = or_(
-                Video.title.ilike(f"%{query_text}%"),
-                Video.description.ilike(f"%{query_text}%"),
-                Video.uploader.has(User.username.ilike(f"%{query_text}%"))
+                Video.title.ilike(pattern),
+                Video.description.ilike(pattern),
+                Video.user_id == any_(cast(uploader_ids, ARRAY(Integer)))
             )
             query = query.where(search_filter)
 
         # Include tags filter (video must have at least one of these tags)
         if include_tags:
-            query = (
-                query
-                .join(video_tags, Video.id == video_tags.c.video_id)
-                .where(video_tags.c.tag_id.in_(include_tags))
-                .distinct()
+            # Use EXISTS subquery (no join fan-out to DISTINCT away)
+            query = query.where(
+                exists().where(
+                    video_tags.c.video_id == Video.id,
+                    video_tags.c.tag_id.in_(include_tags)
+                )
             )
 
         # Exclude tags filter (video must NOT have any of these tags)
@@ -223,7 +333,7 @@ class VideoService:
         query = query.offset(skip).limit(limit)
 
         result = await db.execute(query)
-        return list(result.scalars().all())
+        return list(result.mappings().all())
 
     @staticmethod
     async def create(
@@ -233,20 +343,26 @@ class VideoService:
         file_path: str,
         file_size: int
     ) -> Video:
-        """Create a new video"""
-        video = Video(
+        """
+        Create a new video
+
+        A single INSERT ... RETURNING loads every column (including ones
+        left NULL, which a plain add/flush would leave unloaded), so the
+        response can be serialized without another SELECT. Not committed;
+        the caller commits once the upload's remaining steps have been
+        added to the same transaction.
+        """
+        stmt = insert(Video).values(
             user_id=user_id,
             title=video_data.title,
             description=video_data.description,
             file_path=file_path,
             file_size=file_size,
             status=VideoStatus.PROCESSING
-        )
+        ).returning(Video)
 
-        db.add(video)
-        await db.commit()
-        await db.refresh(video)
-        return video
+        result = await db.execute(select(Video).from_statement(stmt))
+        return result.scalar_one()
 
     @staticmethod
     async def update(
@@ -260,30 +376,83 @@ class VideoService:
         if video_data.description is not None:
             video.description = video_data.description
 
+        # updated_at comes back through RETURNING (eager_defaults), no refresh
         await db.commit()
-        await db.refresh(video)
         return video
 
     @staticmethod
     async def delete(db: AsyncSession, video: Video) -> None:
-        """Delete video"""
-        # Delete file
-        if os.path.exists(video.file_path):
-            os.remove(video.file_path)
+        """Delete video and every file derived from it"""
+        from app.services import hls_service
+
+        file_path = video.file_path
+        thumbnails_dir = Path(settings.UPLOAD_DIR) / "thumbnails" / str(video.id)
+
+        def remove_files() -> None:
+            # Original, transcoded qualities, thumbnails/preview clips, HLS output
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(file_path)
+            transcoding_service.delete_transcoded_files(file_path)
+            shutil.rmtree(thumbnails_dir, ignore_errors=True)
+            shutil.rmtree(hls_service.get_hls_directory(file_path), ignore_errors=True)
+
+        # The caches are touched only from the event loop; the file work
+        # (possibly thousands of HLS segments) runs in a thread
+        hls_service.invalidate_hls_caches(file_path)
+        await asyncio.to_thread(remove_files)
 
         # Delete from database
         await db.delete(video)
         await db.commit()
 
     @staticmethod
-    async def increment_view_count(db: AsyncSession, video: Video) -> None:
-        """Increment video view count"""
-        video.view_count += 1
+    async def increment_view_count(db: AsyncSession, video_id: int) -> bool:
+        """
+        Increment video view count with one atomic UPDATE (no row load)
+
+        Returns:
+            False if the video does not exist
+        """
+        result = await db.execute(
+            update(Video)
+            .where(Video.id == video_id)
+            .values(view_count=Video.view_count + 1)
+            .returning(Video.id)
+            .execution_options(synchronize_session=False)
+        )
+        found = result.scalar_one_or_none() is not None
         await db.commit()
+        return found
+
+    @staticmethod
+    async def extract_video_metadata(file_path: str) -> dict:
+        """
+        Extract video metadata from the MP4 boxes, falling back to ffprobe.
+        Results are cached per file version (path, mtime, size).
+        """
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return {}
+
+        cache_key = (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+        cached = _metadata_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+        metadata = await VideoService._probe_video_metadata(file_path)
+        if metadata:
+            _metadata_cache.set(cache_key, metadata)
+        return dict(metadata)
 
     @staticmethod
-    def extract_video_metadata(file_path: str) -> dict:
-        """Extract video metadata using ffprobe"""
+    async def _probe_video_metadata(file_path: str) -> dict:
+        """Read metadata from the file (MP4 boxes, else ffprobe)"""
+        try:
+            return await asyncio.to_thread(mp4_probe.probe, file_path)
+        except (ValueError, OSError):
+            pass
+
         try:
             cmd = [
                 settings.FFPROBE_PATH,
@@ -294,11 +463,22 @@ class VideoService:
                 file_path
             ]
 
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode != 0:
+            async with _ffprobe_semaphore:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+                try:
+                    stdout, _ = await asyncio.wait_for(process.communicate(), 30)
+                except asyncio.TimeoutError:
+                    process.kill()
+                    await process.wait()
+                    raise
+            if process.returncode != 0:
                 return {}
 
-            data = json.loads(result.stdout)
+            data = json.loads(stdout)
 
             # Find video stream
             video_stream = None
@@ -316,7 +496,7 @@ class VideoService:
                 'duration': int(float(format_data.get('duration', 0))),
                 'width': video_stream.get('width'),
                 'height': video_stream.get('height'),
-                'fps': eval(video_stream.get('r_frame_rate', '0/1')),
+                'fps': _parse_frame_rate(video_stream.get('r_frame_rate', '0/1')),
                 'codec': video_stream.get('codec_name'),
                 'bitrate': int(format_data.get('bit_rate', 0)) // 1000  # Convert to kbps
             }
@@ -325,9 +505,19 @@ class VideoService:
             return {}
 
     @staticmethod
-    async def update_video_metadata(db: AsyncSession, video: Video) -> Video:
-        """Update video with extracted metadata"""
-        metadata = VideoService.extract_video_metadata(video.file_path)
+    async def update_video_metadata(
+        db: AsyncSession,
+        video: Video,
+        metadata: Optional[dict] = None
+    ) -> Video:
+        """
+        Update video with extracted metadata (flushes, caller commits)
+
+        Pass metadata already extracted with extract_video_metadata to keep
+        the probe outside the caller's transaction; otherwise it runs here.
+        """
+        if metadata is None:
+            metadata = await VideoService.extract_video_metadata(video.file_path)
 
         video.duration = metadata.get('duration')
         video.width = metadata.get('width')
@@ -337,8 +527,7 @@ class VideoService:
         video.bitrate = metadata.get('bitrate')
         video.status = VideoStatus.READY
 
-        await db.commit()
-        await db.refresh(video)
+        await db.flush()
         return video
 
 
@@ -1,10 +1,11 @@
 from typing import List, Optional
-from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_, desc, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload, joinedload
 from sqlalchemy.exc import IntegrityError
 
+from app.core.database import utc_now
 from app.models.watch_history import WatchHistory
 from app.models.video import Video
 from app.schemas.watch_history import WatchHistoryCreate, WatchHistoryUpdate, ContinueWatchingItem
@@ -23,6 +24,10 @@ class WatchHistoryService:
         """
         Save or update watch history (upsert logic)
 
+        Issues a single INSERT ... ON CONFLICT (user_id, video_id) DO UPDATE.
+        The video's existence is enforced by the foreign key, and completion
+        is computed from the video's duration inside the same statement.
+
         Args:
             db: Database session
             user_id: User ID
@@ -31,77 +36,52 @@ class WatchHistoryService:
 
         Returns:
             Updated or created WatchHistory
+
+        Raises:
+            ValueError: If the video does not exist
         """
-        # Get video to calculate completion
-        result = await db.execute(select(Video).where(Video.id == video_id))
-        video = result.scalar_one_or_none()
+        # Calculate completion (>= 90% watched) against the video's duration
+        video_duration = select(Video.duration).where(Video.id == video_id).scalar_subquery()
+        completed = func.coalesce(
+            literal(watch_data.watch_position) * 100.0 / func.nullif(video_duration, 0) >= 90.0,
+            False
+        )
 
-        if not video:
-            raise ValueError("Video not found")
+        stmt = pg_insert(WatchHistory).values(
+            user_id=user_id,
+            video_id=video_id,
+            watch_position=watch_data.watch_position,
+            watch_duration=watch_data.watch_duration,
+            completed=completed,
+            last_watched_at=utc_now(),
+            updated_at=utc_now()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[WatchHistory.user_id, WatchHistory.video_id],
+            set_={
+                "watch_position": stmt.excluded.watch_position,
+                "watch_duration": func.greatest(WatchHistory.watch_duration, stmt.excluded.watch_duration),
+                "completed": stmt.excluded.completed,
+                "last_watched_at": stmt.excluded.last_watched_at,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
 
-        # Check if watch history exists
-        result = await db.execute(
-            select(WatchHistory).where(
-                and_(
-                    WatchHistory.user_id == user_id,
-                    WatchHistory.video_id == video_id
-                )
+        try:
+            result = await db.execute(
+                select(WatchHistory)
+                .from_statement(stmt.returning(WatchHistory))
+                .options(selectinload(WatchHistory.video))
+                .execution_options(populate_existing=True)
             )
-        )
-        existing = result.scalar_one_or_none()
-
-        # Calculate completion (>= 90% watched)
-        completed = False
-        if video.duration and video.duration > 0:
-            progress = (watch_data.watch_position / video.duration) * 100
-            completed = progress >= 90.0
-
-        if existing:
-            # Update existing record
-            existing.watch_position = watch_data.watch_position
-            existing.watch_duration = max(existing.watch_duration, watch_data.watch_duration)
-            existing.completed = completed
-            existing.last_watched_at = datetime.utcnow()
+            history = result.scalar_one()
             await db.commit()
-            await db.refresh(existing)
-            return existing
-        else:
-            # Create new record
-            new_history = WatchHistory(
-                user_id=user_id,
-                video_id=video_id,
-                watch_position=watch_data.watch_position,
-                watch_duration=watch_data.watch_duration,
-                completed=completed,
-                last_watched_at=datetime.utcnow()
-            )
-            db.add(new_history)
-
-            try:
-                await db.commit()
-                await db.refresh(new_history)
-                return new_history
-            except IntegrityError:
-                await db.rollback()
-                # Handle race condition
-                result = await db.execute(
-                    select(WatchHistory).where(
-                        and_(
-                            WatchHistory.user_id == user_id,
-                            WatchHistory.video_id == video_id
-                        )
-                    )
-                )
-                existing = result.scalar_one_or_none()
-                if existing:
-                    existing.watch_position = watch_data.watch_position
-                    existing.watch_duration = max(existing.watch_duration, watch_data.watch_duration)
-                    existing.completed = completed
-                    existing.last_watched_at = datetime.utcnow()
-                    await db.commit()
-                    await db.refresh(existing)
-                    return existing
-                raise
+        except IntegrityError:
+            # Foreign key violation: the video does not exist
+            await db.rollback()
+            raise ValueError("Video not found")
+
+        return history
 
     @staticmethod
     async def get_watch_history(
@@ -116,7 +96,7 @@ class WatchHistoryService:
                     WatchHistory.user_id == user_id,
                     WatchHistory.video_id == video_id
                 )
-            ).options(selectinload(WatchHistory.video))
+            ).options(joinedload(WatchHistory.video))
         )
         return result.scalar_one_or_none()
 
@@ -143,14 +123,17 @@ class WatchHistoryService:
                 )
             )
             .options(
-                selectinload(WatchHistory.video).selectinload(Video.uploader)
+                # Video and uploader are both many-to-one: JOIN them into the
+                # same query instead of issuing extra SELECT ... IN rounds
+                joinedload(WatchHistory.video).joinedload(Video.uploader)
             )
             .order_by(desc(WatchHistory.last_watched_at))
             .limit(limit)
         )
         histories = result.scalars().all()
 
-        # Transform to ContinueWatchingItem
+        # Transform to ContinueWatchingItem; the video is already joined in,
+        # so progress is computed here rather than by a per-row subquery
         items = []
         for history in histories:
             if history.video:  # Safety check
@@ -3,14 +3,66 @@
 Generate preview clips for existing videos
 """
 import asyncio
+import os
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import select
+from sqlalchemy.engine import RowMapping
 
 from app.models.video import Video
 from app.services.thumbnail_service import thumbnail_service
+from app.services.video_service import video_service
 from app.core.config import settings
+from app.core.ffmpeg import encode_cpu_count
+
+
+# Videos processed at once; each ffmpeg run already uses several threads
+JOBS = max(1, encode_cpu_count() // 2)
+
+
+async def process_one(video: RowMapping) -> None:
+    """Generate the preview clips for one video, unless all of them exist"""
+    label = f"Video ID {video.id} ({video.title})"
+
+    # Check if file exists
+    if not Path(video.file_path).exists():
+        print(f"  ❌ {label}: video file not found, skipping...")
+        return
+
+    # Check if preview clips already exist (one directory read, not 7 stats)
+    clips_dir = Path(settings.UPLOAD_DIR) / "thumbnails" / str(video.id)
+    try:
+        with os.scandir(clips_dir) as entries:
+            existing = {entry.name for entry in entries}
+    except FileNotFoundError:
+        existing = set()
+    existing_clips = [i for i in range(1, 8) if f"preview_{i}.mp4" in existing]
+
+    if len(existing_clips) == 7:
+        print(f"  ✅ {label}: all 7 preview clips already exist, skipping...")
+        return
+
+    # Generate preview clips
+    if existing_clips:
+        print(f"  ⚠️  {label}: found {len(existing_clips)} existing clips, regenerating all...")
+    print(f"  🎬 {label}: generating 7 preview clips (3 seconds each)...")
+    try:
+        clip_paths = await thumbnail_service.generate_preview_clips(
+            video.file_path,
+            video.id,
+            num_clips=7,
+            clip_duration=3,
+            duration=video.duration
+        )
+    except Exception as e:
+        print(f"  ❌ {label}: error generating preview clips: {e}")
+        return
+
+    if clip_paths:
+        sizes = ", ".join(f"{Path(path).stat().st_size / 1024:.1f} KB" for path in clip_paths)
+        print(f"  ✅ {label}: generated {len(clip_paths)} preview clips ({sizes})")
+    else:
+        print(f"  ❌ {label}: no preview clips generated")
 
 
 async def main():
@@ -27,59 +79,46 @@ async def main():
         expire_on_commit=False
     )
 
-    async with async_session() as session:
-        # Get all videos
-        result = await session.execute(select(Video))
-        videos = result.scalars().all()
+    print(f"Processing videos, {JOBS} at a time")
 
-        print(f"Found {len(videos)} videos")
+    # ffmpeg runs as a subprocess, so one event loop can drive several at
+    # once: JOBS workers take videos from a small queue fed batch by batch
+    queue: asyncio.Queue = asyncio.Queue(maxsize=JOBS)
 
-        for video in videos:
-            print(f"\n{'='*60}")
-            print(f"Processing video ID {video.id}: {video.title}")
-            print(f"File path: {video.file_path}")
-
-            # Check if file exists
-            if not Path(video.file_path).exists():
-                print(f"  ❌ Video file not found, skipping...")
-                continue
-
-            # Check if preview clips already exist
-            clips_dir = Path(settings.UPLOAD_DIR) / "thumbnails" / str(video.id)
-            existing_clips = []
-            if clips_dir.exists():
-                for i in range(1, 8):
-                    clip_path = clips_dir / f"preview_{i}.mp4"
-                    if clip_path.exists():
-                        existing_clips.append(i)
-
-            if len(existing_clips) == 7:
-                print(f"  ✅ All 7 preview clips already exist, skipping...")
-                continue
-
-            if existing_clips:
-                print(f"  ⚠️  Found {len(existing_clips)} existing clips, regenerating all...")
-
-            # Generate preview clips
+    async def worker():
+        while (video := await queue.get()) is not None:
             try:
-                print(f"  🎬 Generating 7 preview clips (3 seconds each)...")
-                clip_paths = thumbnail_service.generate_preview_clips(
-                    video.file_path,
-                    video.id,
-                    num_clips=7,
-                    clip_duration=3
-                )
-
-                if clip_paths:
-                    print(f"  ✅ Successfully generated {len(clip_paths)} preview clips!")
-                    for i, path in enumerate(clip_paths, 1):
-                        size_kb = Path(path).stat().st_size / 1024
-                        print(f"     - Clip {i}: {size_kb:.1f} KB")
-                else:
-                    print(f"  ❌ No preview clips generated")
-
+                await process_one(video)
             except Exception as e:
-                print(f"  ❌ Error generating preview clips: {e}")
+                # Keep the worker alive, or the producer would block on a full queue
+                print(f"  ❌ Video ID {video.id}: {e}")
+
+    workers = [asyncio.create_task(worker()) for _ in range(JOBS)]
+
+    count = 0
+    last_id = 0
+    while True:
+        # Fetch the next batch (only the columns needed here) in its own
+        # session, so no connection or transaction stays open while the
+        # workers run ffmpeg
+        async with async_session() as session:
+            batch = await video_service.get_batch_after(
+                session, Video.id, Video.title, Video.file_path, Video.duration,
+                after_id=last_id
+            )
+        if not batch:
+            break
+
+        for video in batch:
+            await queue.put(video)
+        count += len(batch)
+        last_id = batch[-1].id
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+    await engine.dispose()
+
+    print(f"\nProcessed {count} videos")
 
     print(f"\n{'='*60}")
     print("Done!")
@@ -0,0 +1,122 @@
+"""
+Test the in-process MP4/MOV metadata reader against synthetic files
+"""
+import os
+import struct
+import tempfile
+
+from app.services import mp4_probe
+
+
+def box(box_type: bytes, *children: bytes) -> bytes:
+    payload = b"".join(children)
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def large_box(box_type: bytes, payload: bytes) -> bytes:
+    """Box with a 64-bit size (size field 1, largesize after the type)"""
+    return struct.pack(">I4sQ", 1, box_type, 16 + len(payload)) + payload
+
+
+def timescale_duration(box_type: bytes, timescale: int, duration: int) -> bytes:
+    """Version 0 mvhd/mdhd: flags, creation, modification, timescale, duration"""
+    return box(box_type, struct.pack(">IIIII", 0, 0, 0, timescale, duration), bytes(80))
+
+
+def trak(handler: bytes, sample_entry: bytes, stts_entries: list[tuple[int, int]]) -> bytes:
+    hdlr = box(b"hdlr", struct.pack(">II4s", 0, 0, handler), bytes(13))
+    stsd = box(b"stsd", struct.pack(">II", 0, 1), sample_entry)
+    stts = box(
+        b"stts",
+        struct.pack(">II", 0, len(stts_entries)),
+        *(struct.pack(">II", count, delta) for count, delta in stts_entries)
+    )
+    return box(
+        b"trak",
+        box(
+            b"mdia",
+            timescale_duration(b"mdhd", 30000, 315315),
+            hdlr,
+            box(b"minf", box(b"stbl", stsd, stts))
+        )
+    )
+
+
+def visual_sample_entry(fourcc: bytes, width: int, height: int) -> bytes:
+    """size, fourcc, 6 reserved, data_reference_index, 16 pre-defined, width, height"""
+    body = bytes(6) + struct.pack(">H", 1) + bytes(16) + struct.pack(">HH", width, height) + bytes(50)
+    return struct.pack(">I4s", 8 + len(body), fourcc) + body
+
+
+def build_mp4() -> bytes:
+    """ftyp, a 64-bit mdat, then moov with an audio trak ahead of the video trak"""
+    audio = trak(b"soun", struct.pack(">I4s", 36, b"mp4a") + bytes(28), [(100, 1024)])
+    video = trak(
+        b"vide",
+        visual_sample_entry(b"avc1", 1920, 1080),
+        # The dominant delta (300 samples of 1001) sets the frame rate
+        [(1, 2002), (300, 1001), (2, 500)]
+    )
+    moov = box(b"moov", timescale_duration(b"mvhd", 1000, 10500), audio, video)
+    return (
+        box(b"ftyp", b"isom", struct.pack(">I", 512), b"isomavc1")
+        + large_box(b"mdat", bytes(4096))
+        + moov
+    )
+
+
+def write_temp(data: bytes) -> str:
+    fd, path = tempfile.mkstemp(suffix=".mp4")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+def probe_bytes(data: bytes) -> dict:
+    path = write_temp(data)
+    try:
+        return mp4_probe.probe(path)
+    finally:
+        os.remove(path)
+
+
+def assert_rejected(data: bytes):
+    try:
+        probe_bytes(data)
+    except ValueError:
+        return
+    raise AssertionError("expected ValueError so the caller falls back to ffprobe")
+
+
+def test_probe_reads_moov_after_large_mdat():
+    data = build_mp4()
+    metadata = probe_bytes(data)
+
+    assert metadata["duration"] == 10
+    assert metadata["width"] == 1920
+    assert metadata["height"] == 1080
+    assert metadata["codec"] == "h264"
+    assert abs(metadata["fps"] - 30000 / 1001) < 1e-9
+    assert metadata["bitrate"] == int(len(data) * 8 / 10.5) // 1000
+
+
+def test_probe_rejects_non_mp4():
+    assert_rejected(b"RIFF" + bytes(60) + b"AVI LIST")
+
+
+def test_probe_rejects_truncated_file():
+    data = build_mp4()
+    assert_rejected(data[:len(data) - 40])
+
+
+def test_probe_rejects_malformed_child_box():
+    # moov claims a child larger than itself
+    moov = box(b"moov", struct.pack(">I4s", 4096, b"mvhd"), bytes(16))
+    assert_rejected(box(b"ftyp", b"isom", bytes(4)) + moov)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: ok")